@@ -7,6 +7,12 @@ from urllib.parse import urlparse
 import socket
 import subprocess
 import traceback
+import sys
+
+# 共用 scripts/livesource3/net_tools.py（keep-alive连接池、响应解压、URL去重键）和 m3u_parser.py（m3u解析）
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import net_tools
+import m3u_parser
 
 timestart = datetime.now()
 BlackHost = ["127.0.0.1:8080", "live3.lalifeier.eu.org", "newcntv.qcloudcdn.com"]
@@ -34,10 +40,11 @@ def check_url(url, timeout=6):
             headers = {
                 'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
             }
-            req = urllib.request.Request(encoded_url, headers=headers)
-            with urllib.request.urlopen(req, timeout=timeout) as response:
+            # 通过连接池检测，同一主机的多个URL复用连接
+            with net_tools.open_url(encoded_url, headers, timeout=timeout) as response:
                 if response.status == 200:
                     success = True
+                net_tools.drain_response(response)  # 小的m3u8等读完后连接可复用，视频流直接关闭
         elif url.startswith("p3p"):
             success = check_p3p_url(url, timeout)
         elif url.startswith("p2p"):
@@ -151,23 +158,23 @@ def get_url_file_extension(url):
     path = parsed_url.path
     return os.path.splitext(path)[1]
 
+# m3u转为"频道名称,URL"行（只检测http地址）；与原来一样只取#EXTINF与URL行，m3u中夹带的"频道名称,URL"行不取
+# 名称中的逗号已由m3u_parser换成空格，与livesource3.py相同
 def convert_m3u_to_txt(m3u_content):
-    lines = m3u_content.split('\n')
-    txt_lines = []
-    channel_name = ""
-    for line in lines:
-        if line.startswith("#EXTM3U"):
-            continue
-        if line.startswith("#EXTINF"):
-            channel_name = line.split(',')[-1].strip()
-        elif line.startswith("http"):
-            txt_lines.append(f"{channel_name},{line.strip()}")
-    return txt_lines
-
-def process_url(url):
+    return [f"{entry.name},{entry.url}"
+            for entry in m3u_parser.iter_m3u_entries(m3u_content.split('\n'), include_txt_lines=False)
+            if entry.url.startswith("http")]
+
+def process_url(url, timeout=30):
     try:
-        with urllib.request.urlopen(url) as response:
-            data = response.read()
+        headers = {
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+            'Accept-Encoding': 'gzip, deflate',
+        }
+        # 与check_url一样通过连接池下载，按Content-Encoding解压（net_tools.read_response_body，与livesource3.py共用）
+        with net_tools.open_url(url.strip(), headers, timeout=timeout) as response:
+            data, wire_size = net_tools.read_response_body(response)
+            runtime_stats.append(f"传输统计: {wire_size}/{len(data)},{url.strip()}")  # 收集传输字节/解压后字节
             text = data.decode('utf-8')
             if get_url_file_extension(url) in [".m3u", ".m3u8"]:
                 m3u_lines = convert_m3u_to_txt(text)
@@ -187,14 +194,15 @@ def process_url(url):
         print(err_msg)
         runtime_stats.append(err_msg)  # 收集错误统计
 
+# 按URL去重键（net_tools.canonical_url_key，与livesource3.py相同）去重，等价的URL写法只检测一次
 def remove_duplicates_url(lines):
-    urls = []
+    urls = set()  # 已保留行的URL去重键，只用于判断是否重复，行顺序由newlines保持
     newlines = []
     for line in lines:
         if "," in line and "://" in line:
-            channel_url = line.split(',')[1].strip()
+            channel_url = net_tools.canonical_url_key(line.split(',')[1])
             if channel_url not in urls:
-                urls.append(channel_url)
+                urls.add(channel_url)
                 newlines.append(line)
     return newlines
 
@@ -208,6 +216,16 @@ def clean_url(lines):
             newlines.append(line)
     return newlines
 
+# 剔除签名参数（wsTime、txTime、auth_key、expires等）已过期的URL，过期的必然失效，不再检测
+def remove_expired_url(lines):
+    now = time.time()
+    newlines = []
+    for line in lines:
+        expiry = net_tools.get_url_expiry(line.split(',', 1)[1].strip())
+        if expiry is None or expiry > now:
+            newlines.append(line)
+    return newlines
+
 def split_url(lines):
     newlines = []
     for line in lines:
@@ -284,6 +302,12 @@ if __name__ == "__main__":
         print(msg)
         runtime_stats.append(msg)  # 收集去$后统计
 
+        lines = remove_expired_url(lines)
+        urls_hj_before4 = len(lines)
+        msg = f"去签名过期后行数: {urls_hj_before4}"
+        print(msg)
+        runtime_stats.append(msg)  # 收集去过期后统计
+
         lines = remove_duplicates_url(lines)
         urls_hj = len(lines)
         msg = f"去重后行数: {urls_hj}"
@@ -302,6 +326,10 @@ if __name__ == "__main__":
         msg = f"检测结果: 成功{urls_ok}条, 失败{urls_ng}条"
         print(msg)
         runtime_stats.append(msg)  # 收集检测结果统计
+        msg = net_tools.connection_reuse_summary()
+        print(msg)
+        runtime_stats.append(msg)  # 收集连接复用统计
+        net_tools.close_all_connections()
 
         # 结果整理与保存
         def remove_prefix_from_lines(lines):
@@ -2,11 +2,25 @@ import urllib.request
 from urllib.parse import urlparse
 import re #正则
 import os
+import sys
 from datetime import datetime, timedelta, timezone
 import random
 import opencc #简繁转换
+import net_tools #keep-alive连接池（与blacklist.py共用）
+import m3u_parser #m3u解析（与blacklist.py共用）
 import socket
 import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import concurrent.futures
+import queue
+import hashlib
+import json
+import codecs
+import itertools
+import functools
+import collections
+import zipfile
 
 # ======================
 # 初始化配置
@@ -15,15 +29,115 @@ import time
 #创建输出目录（如果不存在）
 os.makedirs('output', exist_ok=True)
 
-#简繁转换
+# 并发抓取配置：总并发数，以及单个主机的并发上限（多个订阅源共用 raw.githubusercontent.com）
+FETCH_MAX_WORKERS = 16
+FETCH_PER_HOST_LIMIT = 4
+# 下载与分类之间的有界队列长度：已提交下载但还没开始分类的源超过该数量时暂停提交新的下载（背压）
+FETCH_QUEUE_SIZE = 16
+
+# HTTP缓存目录：按URL保存订阅内容及ETag/Last-Modified，下次运行发送条件请求，304时直接复用
+HTTP_CACHE_DIR = 'scripts/livesource3/cache/http'
+# 快照最长有效期（小时）：下载失败时使用缓存中最后一次成功的内容，超过该时长的快照不再使用
+SNAPSHOT_MAX_AGE_HOURS = 72
+# 下载时每次读取的块大小（字节），订阅内容边下载边写入缓存文件，不整体读入内存
+FETCH_CHUNK_SIZE = 64 * 1024
+
+# 运行截止时间：整个脚本最多运行RUN_DEADLINE_SECONDS秒，订阅下载需在截止前FETCH_DEADLINE_MARGIN秒结束（留给分类和生成文件）
+# 超过截止时间仍未完成的下载会被取消并改用快照
+RUN_DEADLINE_SECONDS = 20 * 60
+FETCH_DEADLINE_MARGIN = 3 * 60
+# 单个请求的连接超时和读取超时（秒）
+FETCH_CONNECT_TIMEOUT = 10
+FETCH_READ_TIMEOUT = 30
+
+# 响应大小上限（字节，按解压后计算）：超过时停止读取，可按源（主地址）单独设置
+FETCH_MAX_BYTES = 20 * 1024 * 1024
+FETCH_MAX_BYTES_PER_SOURCE = {
+    # 'https://example.com/big.txt': 50 * 1024 * 1024,
+}
+# Content-Type为视频/音频/图片的响应不是订阅内容，不读取
+FETCH_REJECT_CONTENT_TYPES = ('video/', 'audio/', 'image/')
+# m3u播放列表通常以audio/mpegurl、audio/x-mpegurl返回（Python mimetypes、nginx的默认值），是订阅内容，不在上面的拒绝范围内
+FETCH_PLAYLIST_CONTENT_TYPES = frozenset(['audio/mpegurl', 'audio/x-mpegurl', 'audio/vnd.apple.mpegurl',
+                                          'application/vnd.apple.mpegurl', 'application/x-mpegurl'])
+# 连续SOURCE_BLOCK_AFTER次因超过大小上限或内容类型不符而中止的订阅源，之后SOURCE_BLOCK_DAYS天内不再下载（成功下载一次即清零）
+SOURCE_BLOCK_AFTER = 3
+SOURCE_BLOCK_DAYS = 7
+
+# 镜像对冲请求：urls-daily.txt中同一订阅的镜像地址写在同一行（主地址|镜像1|镜像2）
+# 先请求主地址，超过对冲延迟仍未返回再请求下一个镜像（某个请求失败时立即请求下一个），采用最先成功的结果并取消其余请求
+# 对冲延迟取历史响应时间（发出请求到收到响应头，不含下载内容的时间）的HEDGE_PERCENTILE分位数（样本不足时用HEDGE_DEFAULT_DELAY）
+HEDGE_PERCENTILE = 90
+HEDGE_MIN_SAMPLES = 5
+HEDGE_DEFAULT_DELAY = 2.0
+HEDGE_MIN_DELAY = 0.5
+
+# 签名URL（wsTime、txTime、auth_key、expires等参数）在分类前按过期时间过滤，剩余有效期不足该秒数的也视为过期
+URL_EXPIRY_MARGIN = 10 * 60
+
+# 订阅源产出统计：按源记录下载耗时、字节数、行数、新增URL数以及之后被检测为失效的URL数，跨运行保存
+SOURCE_STATS_FILE = 'scripts/livesource3/cache/source_stats.json'
+SOURCE_STATS_HISTORY = 10  # 每个源保留最近几次下载的记录
+# 降级：最近SOURCE_DEMOTE_WINDOW次下载平均有效新增URL（新增-失效）少于SOURCE_DEMOTE_MIN_YIELD，
+# 且平均下载耗时不少于SOURCE_DEMOTE_MIN_SECONDS秒的源，之后SOURCE_DEMOTE_HOURS小时内不再下载，直接使用快照
+SOURCE_DEMOTE_WINDOW = 5
+SOURCE_DEMOTE_MIN_YIELD = 5
+SOURCE_DEMOTE_MIN_SECONDS = 2.0
+SOURCE_DEMOTE_HOURS = 24
+
+# 行级增量处理：按源保存上次各行URL的解析结果（去重键、签名过期时间），内容未变的行直接复用，只有新增的行重新解析
+# 名称的规范化和分类结果不按行保存，复用时查名称缓存；分类规则（字典文件或本脚本）变化时自动失效
+LINE_RECORD_DIR = 'scripts/livesource3/cache/records'
+# 频道名称缓存：原始频道名称 -> 规范化后的名称和可归入的分类，跨运行保存，同名频道的新URL也不必重新规范化
+# 分类规则、名称规则、纠错文件或简繁词典变化时自动失效；只保存本次运行用到的名称
+NAME_CACHE_FILE = 'scripts/livesource3/cache/names.json'
+
+# 频道名称规范化规则（删除字样、CCTV和卫视名称整理），每节编译为一个正则，一次扫描完成
+NAME_RULES_FILE = 'scripts/livesource3/name_rules.txt'
+# 频道名称纠错文件
+CORRECTIONS_NAME_FILE = 'scripts/livesource3/corrections_name.txt'
+# 简繁转换结果缓存的名称数（LRU）
+T2S_CACHE_SIZE = 8192
+
+# 录制/回放（离线基准测试）：环境变量LIVESOURCE3_FIXTURE=record时把本次用到的订阅内容保存到存档，
+# =replay时不访问网络，直接使用存档中的内容，便于在固定数据上比较解析/分类/生成的耗时
+FIXTURE_MODE = os.environ.get('LIVESOURCE3_FIXTURE', '').strip().lower()
+FIXTURE_ARCHIVE = os.environ.get('LIVESOURCE3_FIXTURE_ARCHIVE', 'scripts/livesource3/cache/fixtures.zip')
+# 回放时存档内容解压到该目录
+FIXTURE_REPLAY_DIR = 'scripts/livesource3/cache/replay'
+
+#简繁转换：全局共用一个转换器（"t2s" 表示从繁体转为简体），词典只加载一次
+t2s_converter = opencc.OpenCC('t2s')
+
+# 简繁转换快速路径的单字表：名称中没有任何字出现在词组词典（TSPhrases）的词条里时，不会按词组转换，
+# 逐字查单字表与完整转换结果相同。表中的值由转换器逐字转换得到；取不到词典文件时返回 (None, None)，全部走完整转换
+def load_t2s_char_table():
+    dictionary_dir = os.path.join(os.path.dirname(opencc.__file__), 'dictionary')
+    try:
+        with open(os.path.join(dictionary_dir, 'TSPhrases.txt'), 'r', encoding='utf-8') as f:
+            phrase_chars = frozenset(char for line in f for char in line.split('\t')[0].strip())
+        with open(os.path.join(dictionary_dir, 'TSCharacters.txt'), 'r', encoding='utf-8') as f:
+            chars = [line.split('\t')[0] for line in f if '\t' in line]
+    except OSError:
+        return None, None
+    if any(len(char) != 1 for char in chars):
+        return None, None
+    table = {ord(char): t2s_converter.convert(char) for char in chars if char not in phrase_chars}
+    return table, phrase_chars
+
+t2s_char_table, t2s_phrase_chars = load_t2s_char_table()
+
+# 同一名称在各订阅源中反复出现，转换结果按名称缓存
+@functools.lru_cache(maxsize=T2S_CACHE_SIZE)
 def traditional_to_simplified(text: str) -> str:
-    # 初始化转换器，"t2s" 表示从繁体转为简体
-    converter = opencc.OpenCC('t2s')
-    simplified_text = converter.convert(text)
-    return simplified_text
+    if t2s_char_table is not None and t2s_phrase_chars.isdisjoint(text):
+        return text.translate(t2s_char_table)
+    return t2s_converter.convert(text)
 
 # 执行开始时间
 timestart = datetime.now()
+# 订阅下载截止时间（时间戳）
+fetch_deadline = time.time() + RUN_DEADLINE_SECONDS - FETCH_DEADLINE_MARGIN
 # 报时  '',
 #print(f"time: {datetime.now().strftime("%Y%m%d_%H_%M_%S")}")
 
@@ -62,7 +176,7 @@ blacklist_auto = read_blacklist_from_txt('scripts/livesource3/blacklist/blacklis
 blacklist_manual = read_blacklist_from_txt('scripts/livesource3/blacklist/blacklist_manual.txt')
 
 # 合并黑名单（使用集合提高检索效率）
-combined_blacklist = set(blacklist_auto + blacklist_manual)
+combined_blacklist = {net_tools.canonical_url_key(url) for url in blacklist_auto + blacklist_manual}  # 按URL去重键保存
 
 
 # 定义多个对象用于存储不同内容的行文本
@@ -125,7 +239,127 @@ xq_lines = [] #戏曲
 jlp_lines = [] #记录片
 
 other_lines = []      # 其他频道
-other_lines_url = []  # 用于去重的URL列表
+other_lines_url = set()  # 其他频道已有的URL去重键，用于去重
+
+# ======================
+# 频道记录
+# ======================
+
+# 分类中的一个频道：名称和URL分开保存，不再反复split "名称,URL"，写文件时才拼成一行
+# source为来源（订阅源URL或手工区文件），category为分类key，latency为响应时间（毫秒，只有白名单源有），
+# url_key为URL去重键（net_tools.canonical_url_key，不指定时由url计算）
+class ChannelRecord:
+    __slots__ = ('name', 'url', 'source', 'category', 'latency', 'url_key')
+
+    def __init__(self, name, url, source=None, category=None, latency=None, url_key=None):
+        self.name = sys.intern(name)  # 同名频道共用一个字符串
+        self.url = url
+        self.source = source
+        self.category = category
+        self.latency = latency
+        self.url_key = url_key if url_key is not None else net_tools.canonical_url_key(url)
+
+    # 与 "名称,URL" 文本的行为一致：名称和URL都相同即为同一行（set去重），排序按整行文本
+    def __eq__(self, other):
+        return isinstance(other, ChannelRecord) and self.name == other.name and self.url == other.url
+
+    def __hash__(self):
+        return hash((self.name, self.url))
+
+    def __lt__(self, other):
+        return str(self) < str(other)
+
+    def __str__(self):
+        return f"{self.name},{self.url}"
+
+    def __repr__(self):
+        return f"ChannelRecord({self.name!r}, {self.url!r})"
+
+    # 返回改名后的记录（名称不变时返回自身）
+    def renamed(self, name):
+        if name == self.name:
+            return self
+        return ChannelRecord(name, self.url, self.source, self.category, self.latency, self.url_key)
+
+# 读取 "名称,URL" 格式的文本文件（手工区等）为频道记录，来源记为文件名，没有逗号的行丢弃
+def read_channel_records(file_name):
+    records = []
+    for line in read_txt_to_array(file_name):
+        if ',' in line:
+            name, url = line.split(',', 1)
+            records.append(ChannelRecord(name, url, file_name))
+    return records
+
+# ======================
+# 频道名称规范化规则
+# ======================
+
+# 读取规则文件，返回 {节名: [(原文, 替换为, 是否正则)]}
+def load_name_rules(filename):
+    sections = {}
+    rules = None
+    with open(filename, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            if line.endswith(',#genre#'):
+                rules = sections.setdefault(line[:-len(',#genre#')], [])
+                continue
+            if rules is None:
+                continue
+            pattern, _, replacement = line.partition(',')
+            is_regex = pattern.startswith('re:')
+            if is_regex:
+                pattern = pattern[len('re:'):]
+            if (pattern, replacement, is_regex) not in rules:
+                rules.append((pattern, replacement, is_regex))
+    return sections
+
+# 把一节规则编译为一个交替正则（同一位置取靠前的规则），返回 text -> 替换后的text
+# 原文规则按匹配到的文字查替换内容；正则规则各自加一层分组，按match.lastindex查（原文规则不加分组，保留正则引擎的前缀快速扫描）
+def compile_name_rules(rules):
+    if not rules:
+        return lambda text: text
+    alternatives = []
+    literal_replacements = {}  # 原文 -> 替换为
+    regex_replacements = {}    # 正则规则最外层分组的序号 -> 替换为
+    group = 1
+    for pattern, replacement, is_regex in rules:
+        if is_regex:
+            alternatives.append(f"({pattern})")
+            regex_replacements[group] = replacement
+            group += re.compile(pattern).groups + 1
+        elif pattern not in literal_replacements:
+            alternatives.append(re.escape(pattern))
+            literal_replacements[pattern] = replacement
+    compiled = re.compile('|'.join(alternatives))
+    replacements = set(literal_replacements.values()) | set(regex_replacements.values())
+    if len(replacements) == 1:
+        # 替换内容都相同（如全部是删除）时直接用字符串替换，不用每次回调
+        replacement = replacements.pop().replace('\\', '\\\\')
+        return lambda text: compiled.sub(replacement, text)
+    def replace(match):
+        if match.lastindex:
+            return regex_replacements[match.lastindex]
+        return literal_replacements[match.group()]
+    return lambda text: compiled.sub(replace, text)
+
+name_rules = load_name_rules(NAME_RULES_FILE)
+clean_name_rules = compile_name_rules(name_rules.get('名称清理', []))
+cctv_name_rules = compile_name_rules(name_rules.get('CCTV', []))
+ws_name_rules = compile_name_rules(name_rules.get('卫视', []))
+
+# CCTV名称只保留数字、K和+：str.translate查表，表项第一次遇到某个字符时按isdigit()计算后缓存
+class CCTVNumberChars(dict):
+    def __missing__(self, code):
+        char = chr(code)
+        self[code] = code if char.isdigit() or char == 'K' or char == '+' else None
+        return self[code]
+
+cctv_number_chars = CCTVNumberChars()
+cctv_quality_pattern = re.compile(r'4K|8K')
+
 # ======================
 # 频道名称处理函数
 # ======================
@@ -142,30 +376,25 @@ def process_name_string(input_str):
 def process_part(part_str):
     # CCTV频道特殊处理（处理逻辑）
     if "CCTV" in part_str  and "://" not in part_str:
-        part_str=part_str.replace("IPV6", "")  #先剔除IPV6字样
-        part_str=part_str.replace("PLUS", "+")  #替换PLUS
-        part_str=part_str.replace("1080", "")  #替换1080
-        filtered_str = ''.join(char for char in part_str if char.isdigit() or char == 'K' or char == '+')
+        part_str = cctv_name_rules(part_str)  #剔除IPV6、1080字样，替换PLUS（name_rules.txt中的CCTV节）
+        filtered_str = part_str.translate(cctv_number_chars)
         if not filtered_str.strip(): #处理特殊情况，如果发现没有找到频道数字返回原名称
             filtered_str=part_str.replace("CCTV", "")
 
        # 4K/8K特殊处理
-        if len(filtered_str) > 2 and re.search(r'4K|8K', filtered_str):   # 特殊处理CCTV中部分4K和8K名称
-            # 使用正则表达式替换，删除4K或8K后面的字符，并且保留4K或8K
-            filtered_str = re.sub(r'(4K|8K).*', r'\1', filtered_str)
+        quality = cctv_quality_pattern.search(filtered_str) if len(filtered_str) > 2 else None
+        if quality:   # 特殊处理CCTV中部分4K和8K名称
+            # 删除4K或8K后面的字符，并且保留4K或8K
+            filtered_str = filtered_str[:quality.end()]
             if len(filtered_str) > 2: 
                 # 给4K或8K添加括号
-                filtered_str = re.sub(r'(4K|8K)', r'(\1)', filtered_str)
+                filtered_str = f"{filtered_str[:quality.start()]}({quality.group()})"
 
         return "CCTV"+filtered_str 
 
-    # 卫视频道处理
+    # 卫视频道处理：去掉"卫视"后面「」中的内容（name_rules.txt中的卫视节）
     elif "卫视" in part_str:
-        # 定义正则表达式模式，匹配“卫视”后面的内容
-        pattern = r'卫视「.*」'
-        # 使用sub函数替换匹配的内容为空字符串
-        result_str = re.sub(pattern, '卫视', part_str)
-        return result_str
+        return ws_name_rules(part_str)
     
     return part_str
 
@@ -183,51 +412,43 @@ def get_url_file_extension(url):
     extension = os.path.splitext(path)[1]
     return extension
 
-def convert_m3u_to_txt(m3u_content):
-    # 分行处理
-    lines = m3u_content.split('\n')
-    
-    # 用于存储结果的列表
-    txt_lines = []
-    
-    # 临时变量用于存储频道名称
-    channel_name = ""
-    
+# 逐行读取已下载的订阅内容（文件按需解码，不整体读入内存），去掉行尾换行符
+def iter_body_lines(body_path):
+    # newline='\n'：只按\n分行，与原来的 text.split('\n') 保持一致
+    with open(body_path, 'r', encoding='utf-8', newline='\n') as f:
+        for line in f:
+            yield line[:-1] if line.endswith('\n') else line
+
+# 订阅内容逐行处理流水线：识别m3u并解析，尽早丢弃#genre#、tvbus://、/udp/等无效行，产出 (频道名称, URL部分)
+def iter_source_channels(body_path, is_m3u_url=False):
+    lines = iter_body_lines(body_path)
+    # 跳过开头的空行，取第一行判断是否为m3u格式
+    first_line = None
     for line in lines:
-        # 过滤掉 #EXTM3U 开头的行
-        if line.startswith("#EXTM3U"):
+        if line.strip():
+            first_line = line.lstrip()
+            break
+    if first_line is None:
+        return
+    lines = itertools.chain([first_line], lines)
+
+    #处理m3u和m3u8，提取channel_name和channel_address
+    #增加扩展名非m3u和m3u8为扩展名的m3u格式
+    if is_m3u_url or first_line.startswith("#EXTM3U") or first_line.startswith("#EXTINF"):
+        channels = (entry[:2] for entry in m3u_parser.iter_m3u_entries(lines))
+    else:
+        channels = (line.split(',', 1) for line in lines if "," in line)
+
+    for channel_name, channel_address in channels:
+        # tvbus://剔除tvbus
+        # /udp/剔除组播
+        # 这些标记都不含逗号，分别检查名称和URL部分，与检查整行等价
+        if "://" not in channel_address and "://" not in channel_name:
             continue
-        # 处理 #EXTINF 开头的行
-        if line.startswith("#EXTINF"):
-            # 获取频道名称（假设频道名称在引号后）
-            channel_name = line.split(',')[-1].strip()
-        # 处理 URL 行
-        elif line.startswith("http") or line.startswith("rtmp") or line.startswith("p3p") :
-            txt_lines.append(f"{channel_name},{line.strip()}")
-        
-        # 处理后缀名为m3u，但是内容为txt的文件
-        if "#genre#" not in line and "," in line and "://" in line:
-            # 定义正则表达式，匹配频道名称,URL 的格式，并确保 URL 包含 "://"
-            # xxxx,http://xxxxx.xx.xx
-            pattern = r'^[^,]+,[^\s]+://[^\s]+$'
-            if bool(re.match(pattern, line)):
-                txt_lines.append(line)
-    
-    # 将结果合并成一个字符串，以换行符分隔
-    return '\n'.join(txt_lines)
-
-# 检查在list是否已经存在url 2025-07-20 13:14
-def check_url_existence(data_list, url):
-    """
-    Check if a given URL exists in a list of data.
-
-    :param data_list: List of strings containing the data
-    :param url: The URL to check for existence
-    :return: True if the URL exists in the list, otherwise False
-    """
-    # Extract URLs from the data list
-    urls = [item.split(',')[1] for item in data_list]
-    return url not in urls #如果不存在则返回true，需要
+        if ("#genre#" in channel_address or "tvbus://" in channel_address or "/udp/" in channel_address
+                or "#genre#" in channel_name or "tvbus://" in channel_name or "/udp/" in channel_name):
+            continue
+        yield channel_name, channel_address
 
 # 处理带$的URL，把$之后的内容都去掉（包括$也去掉） 【2025-07-20 13:14】
 def clean_url(url):
@@ -236,14 +457,10 @@ def clean_url(url):
         return url[:last_dollar_index]
     return url
 
-# 添加channel_name前剔除部分特定字符
-removal_list = ["_电信", "电信", "高清", "频道", "（HD）", "-HD","HD","BD","英陆","_ITV","(北美)","(HK)","AKtv","「IPV4」","「IPV6」",
-                "频陆","备陆","壹陆","贰陆","叁陆","肆陆","伍陆","陆陆","柒陆", "频晴","频粤","[超清]","高清","超清","标清","斯特",
-                "粤陆", "国陆","肆柒","频英","频特","频国","频壹","频贰","肆贰","频测","咪咕","闽特","高特","频高","频标","汝阳"]
-def clean_channel_name(channel_name, removal_list):
+# 添加channel_name前剔除部分特定字符（name_rules.txt中的名称清理节，一次扫描全部删除）
+def clean_channel_name(channel_name):
     """清理频道名称中的特定字符"""
-    for item in removal_list:
-        channel_name = channel_name.replace(item, "")
+    channel_name = clean_name_rules(channel_name)
 
     # 移除末尾的 'HD'
     if channel_name.endswith("HD"):
@@ -260,129 +477,75 @@ def clean_channel_name(channel_name, removal_list):
 # ====================
 
 # 分发直播源，归类，把这部分从process_url剥离出来，为以后加入whitelist源清单做准备。
-def process_channel_line(line):
-    if  "#genre#" not in line and "#EXTINF:" not in line and "," in line and "://" in line:
-        channel_name=line.split(',')[0].strip()
-        channel_name= clean_channel_name(channel_name, removal_list)  #分发前清理channel_name中特定字符
-        channel_name = traditional_to_simplified(channel_name)  #繁转简
-
-        channel_address=clean_url(line.split(',')[1].strip())  #把URL中$之后的内容都去掉
-        line=channel_name+","+channel_address #重新组织line
-
-        if channel_address not in combined_blacklist: # 检查是否在黑名单中
-            # 根据行内容判断存入哪个对象，开始分发
-            if "CCTV" in channel_name and check_url_existence(ys_lines, channel_address) : #央视频道
-                ys_lines.append(process_name_string(line.strip()))
-            elif channel_name in ws_dictionary and check_url_existence(ws_lines, channel_address): #卫视频道
-                ws_lines.append(process_name_string(line.strip()))
-            elif channel_name in zj_dictionary and check_url_existence(zj_lines, channel_address):  #scripts/livesource3/地方台-浙江频道
-                zj_lines.append(process_name_string(line.strip()))
-            elif channel_name in jsu_dictionary and check_url_existence(jsu_lines, channel_address):  #scripts/livesource3/地方台-江苏频道
-                jsu_lines.append(process_name_string(line.strip()))
-            elif channel_name in gd_dictionary and check_url_existence(gd_lines, channel_address):  #scripts/livesource3/地方台-广东频道
-                gd_lines.append(process_name_string(line.strip()))
-            elif channel_name in hn_dictionary and check_url_existence(hn_lines, channel_address):  #scripts/livesource3/地方台-湖南频道
-                hn_lines.append(process_name_string(line.strip()))
-            elif channel_name in hb_dictionary and check_url_existence(hb_lines, channel_address):  #scripts/livesource3/地方台-湖北频道
-                hb_lines.append(process_name_string(line.strip()))
-            elif channel_name in ah_dictionary and check_url_existence(ah_lines, channel_address):  #scripts/livesource3/地方台-安徽频道
-                ah_lines.append(process_name_string(line.strip()))
-            elif channel_name in hain_dictionary and check_url_existence(hain_lines, channel_address):  #scripts/livesource3/地方台-海南频道
-                hain_lines.append(process_name_string(line.strip()))
-            elif channel_name in nm_dictionary and check_url_existence(nm_lines, channel_address):  #scripts/livesource3/地方台-内蒙频道
-                nm_lines.append(process_name_string(line.strip()))
-            elif channel_name in ln_dictionary and check_url_existence(ln_lines, channel_address):  #scripts/livesource3/地方台-辽宁频道
-                ln_lines.append(process_name_string(line.strip()))
-            elif channel_name in sx_dictionary and check_url_existence(sx_lines, channel_address):  #scripts/livesource3/地方台-陕西频道
-                sx_lines.append(process_name_string(line.strip()))
-            elif channel_name in shanxi_dictionary and check_url_existence(shanxi_lines, channel_address):  #scripts/livesource3/地方台-山西频道
-                shanxi_lines.append(process_name_string(line.strip()))
-            elif channel_name in shandong_dictionary and check_url_existence(shandong_lines, channel_address):  #scripts/livesource3/地方台-山东频道
-                shandong_lines.append(process_name_string(line.strip()))
-            elif channel_name in yunnan_dictionary and check_url_existence(yunnan_lines, channel_address):  #scripts/livesource3/地方台-云南频道
-                yunnan_lines.append(process_name_string(line.strip()))
-            elif channel_name in bj_dictionary and check_url_existence(bj_lines, channel_address):  #scripts/livesource3/地方台-北京频道
-                bj_lines.append(process_name_string(line.strip()))
-            elif channel_name in cq_dictionary and check_url_existence(cq_lines, channel_address):  #scripts/livesource3/地方台-重庆频道
-                cq_lines.append(process_name_string(line.strip()))
-            elif channel_name in fj_dictionary and check_url_existence(fj_lines, channel_address):  #scripts/livesource3/地方台-福建频道
-                            fj_lines.append(process_name_string(line.strip()))
-            elif channel_name in gs_dictionary and check_url_existence(gs_lines, channel_address):  #scripts/livesource3/地方台-甘肃频道
-                gs_lines.append(process_name_string(line.strip()))
-            elif channel_name in gx_dictionary and check_url_existence(gx_lines, channel_address):  #scripts/livesource3/地方台-广西频道
-                gx_lines.append(process_name_string(line.strip()))
-            elif channel_name in gz_dictionary and check_url_existence(gz_lines, channel_address):  #scripts/livesource3/地方台-贵州频道
-                gz_lines.append(process_name_string(line.strip()))
-            elif channel_name in heb_dictionary and check_url_existence(heb_lines, channel_address):  #scripts/livesource3/地方台-河北频道
-                heb_lines.append(process_name_string(line.strip()))
-            elif channel_name in hen_dictionary and check_url_existence(hen_lines, channel_address):  #scripts/livesource3/地方台-河南频道
-                hen_lines.append(process_name_string(line.strip()))
-            elif channel_name in hlj_dictionary and check_url_existence(hlj_lines, channel_address):  #scripts/livesource3/地方台-黑龙江频道
-                hlj_lines.append(process_name_string(line.strip()))
-            elif channel_name in jl_dictionary and check_url_existence(jl_lines, channel_address):  #scripts/livesource3/地方台-吉林频道
-                jl_lines.append(process_name_string(line.strip()))
-            elif channel_name in nx_dictionary and check_url_existence(nx_lines, channel_address):  #scripts/livesource3/地方台-宁夏频道
-                nx_lines.append(process_name_string(line.strip()))
-            elif channel_name in jx_dictionary and check_url_existence(jx_lines, channel_address):  #scripts/livesource3/地方台-江西频道
-                jx_lines.append(process_name_string(line.strip()))
-            elif channel_name in qh_dictionary and check_url_existence(qh_lines, channel_address):  #scripts/livesource3/地方台-青海频道
-                qh_lines.append(process_name_string(line.strip()))
-            elif channel_name in sc_dictionary and check_url_existence(sc_lines, channel_address):  #scripts/livesource3/地方台-四川频道
-                sc_lines.append(process_name_string(line.strip()))
-            elif channel_name in sh_dictionary and check_url_existence(sh_lines, channel_address):  #scripts/livesource3/地方台-上海频道
-                sh_lines.append(process_name_string(line.strip()))
-            elif channel_name in tj_dictionary and check_url_existence(tj_lines, channel_address):  #scripts/livesource3/地方台-天津频道
-                tj_lines.append(process_name_string(line.strip()))
-            elif channel_name in xj_dictionary and check_url_existence(xj_lines, channel_address):  #scripts/livesource3/地方台-新疆频道 ADD【2025-07-21 13:14:15】
-                xj_lines.append(process_name_string(line.strip()))
-            elif channel_name in sz_dictionary and check_url_existence(sz_lines, channel_address):  #数字频道
-                sz_lines.append(process_name_string(line.strip()))
-            elif channel_name in gj_dictionary and check_url_existence(gj_lines, channel_address):  #国际频道
-                gj_lines.append(process_name_string(line.strip()))
-            elif channel_name in ty_dictionary and check_url_existence(ty_lines, channel_address):  #体育频道
-                ty_lines.append(process_name_string(line.strip()))
-            elif any(tyss_dictionary in channel_name for tyss_dictionary in tyss_dictionary) and check_url_existence(tyss_lines, channel_address):  #体育赛事
-                tyss_lines.append(process_name_string(line.strip()))
-            elif channel_name in dy_dictionary and check_url_existence(dy_lines, channel_address):  #电影
-                dy_lines.append(process_name_string(line.strip()))
-            elif channel_name in dsj_dictionary and check_url_existence(dsj_lines, channel_address):  #电视剧
-                dsj_lines.append(process_name_string(line.strip()))
-            elif channel_name in gat_dictionary and check_url_existence(gat_lines, channel_address):  #港澳台
-                gat_lines.append(process_name_string(line.strip()))
-            elif channel_name in xg_dictionary and check_url_existence(xg_lines, channel_address):  #香港
-                xg_lines.append(process_name_string(line.strip()))
-            elif channel_name in aomen_dictionary and check_url_existence(aomen_lines, channel_address):  #澳门
-                aomen_lines.append(process_name_string(line.strip()))
-            elif channel_name in tw_dictionary and check_url_existence(tw_lines, channel_address):  #台湾
-                tw_lines.append(process_name_string(line.strip()))
-            elif channel_name in jlp_dictionary and check_url_existence(jlp_lines, channel_address):  #纪录片
-                jlp_lines.append(process_name_string(line.strip()))
-            elif channel_name in dhp_dictionary and check_url_existence(dhp_lines, channel_address):  #动画片
-                dhp_lines.append(process_name_string(line.strip()))
-            elif channel_name in xq_dictionary and check_url_existence(xq_lines, channel_address):  #戏曲
-                xq_lines.append(process_name_string(line.strip()))
-            elif channel_name in js_dictionary and check_url_existence(js_lines, channel_address):  #解说
-                js_lines.append(process_name_string(line.strip()))
-            elif channel_name in cw_dictionary and check_url_existence(cw_lines, channel_address):  #春晚
-                cw_lines.append(process_name_string(line.strip()))
-            elif channel_name in douyu_dictionary and check_url_existence(douyu_lines, channel_address):  #斗鱼直播
-                douyu_lines.append(process_name_string(line.strip()))
-            elif channel_name in huya_dictionary and check_url_existence(huya_lines, channel_address):  #虎牙直播
-                huya_lines.append(process_name_string(line.strip()))
-            elif channel_name in zy_dictionary and check_url_existence(zy_lines, channel_address):  #综艺频道
-                zy_lines.append(process_name_string(line.strip()))
-            elif channel_name in yy_dictionary and check_url_existence(yy_lines, channel_address):  #音乐频道
-                yy_lines.append(process_name_string(line.strip()))
-            elif channel_name in game_dictionary and check_url_existence(game_lines, channel_address):  #游戏频道
-                game_lines.append(process_name_string(line.strip()))
-            elif channel_name in radio_dictionary and check_url_existence(radio_lines, channel_address):  #收音机
-                radio_lines.append(process_name_string(line.strip()))
-            elif channel_name in zb_dictionary and check_url_existence(zb_lines, channel_address):  #直播中国
-                zb_lines.append(process_name_string(line.strip()))
-            else:
-                if channel_address not in other_lines_url:
-                    other_lines_url.append(channel_address)   #记录已加url
-                    other_lines.append(line.strip())
+# 分两步：normalize_channel只依赖频道名称、URL和分类规则，结果可跨运行复用；dispatch_channel_record按本次已有内容去重后存入分类
+
+# 规范化频道名称（先查名称缓存），返回 [整理后的名称, 可归入的分类key列表（按优先级）, 分类用的名称（没有分类时为None）]
+# 原名称和别名（corrections_name.txt）换成的模板名称都查分类，取两者的并集：分类字典里只有模板名称的频道也能归类，
+# 字典里写的是别名的（如香港频道中的"无线新闻"，模板名称为"TVB新闻台"）仍按别名归类；
+# 整理（process_part）后的名称再纠错一次，如 CCTV-01高清 -> CCTV01 -> CCTV1
+def normalize_channel_name(channel_name):
+    channel_name=channel_name.strip()
+    decision = name_cache.get(channel_name)
+    if decision is not None:
+        name_cache_stats['hit'] += 1
+    else:
+        name_cache_stats['miss'] += 1
+        name = clean_channel_name(channel_name)  #分发前清理channel_name中特定字符
+        name = traditional_to_simplified(name)  #繁转简
+        canonical_name = correct_channel_name(name)
+        categories = channel_categories(name, canonical_name)
+        # 分类用的行开头的空白会被去掉（与整行strip后再处理一致）
+        processed_name = correct_channel_name(process_name_string(canonical_name.lstrip())) if categories else None
+        decision = name_cache[channel_name] = [name, categories, processed_name]
+    used_names.add(channel_name)
+    return decision
+
+# 规范化一个频道（名称可以带逗号，URL部分取第一个逗号之前），返回 [整理后的名称, URL, URL去重键, 分类用的名称, 分类用的URL,
+# 可归入的分类key列表（按优先级）, 签名过期时间]（没有分类时分类用的名称和URL为None），不是直播源的返回None
+# line_record为该行上次的行级记录时，URL去重键和签名过期时间直接取记录中的值，不再解析URL
+def normalize_channel(channel_name, channel_address, line_record=None):
+    if not any(mark in channel_name or mark in channel_address for mark in ("#genre#", "#EXTINF:")) and \
+            ("://" in channel_name or "://" in channel_address):
+        channel_name, categories, processed_name = normalize_channel_name(channel_name)
+
+        channel_address=clean_url(channel_address.split(',')[0].strip())  #把URL中$之后的内容都去掉
+
+        processed_address = process_part(channel_address.rstrip()) if categories else None
+        if line_record is None:
+            url_key, expires_at = net_tools.canonical_url_key(channel_address), net_tools.get_url_expiry(channel_address)
+        else:
+            url_key, expires_at = line_record[0] or channel_address, line_record[1]
+        return [channel_name, channel_address, url_key, processed_name, processed_address, categories, expires_at]
+    return None
+
+# 按优先级存入第一个还没有该URL的分类，都没有则存入其他频道；签名已过期的URL直接丢弃
+# 是否重复、是否在黑名单中都按URL去重键判断（等价的URL写法只保留第一个）
+# 返回归入分类的URL去重键（黑名单、过期和未归类的返回None），用于统计订阅源产出
+def dispatch_channel_record(record, source=None, latency=None):
+    channel_name, channel_address, url_key, processed_name, processed_address, categories, expires_at = record
+    if expires_at is not None and expires_at <= url_expiry_cutoff:
+        expired_url_stats['dropped'] += 1
+        return None
+    if url_key not in combined_blacklist: # 检查是否在黑名单中
+        for key in categories:
+            url_keys = category_url_keys[key]
+            if url_key not in url_keys:
+                url_keys.add(url_key)
+                category_lines[key].append(ChannelRecord(processed_name, processed_address, source, key, latency, url_key))
+                return url_key
+        if url_key not in other_lines_url:
+            other_lines_url.add(url_key)   #记录已加url
+            other_lines.append(f"{channel_name},{channel_address}".strip())
+    return None
+
+def process_channel_line(line, source=None, latency=None):
+    if "," not in line:
+        return None
+    channel_name, channel_address = line.split(',', 1)
+    record = normalize_channel(channel_name, channel_address)
+    if record is None:
+        return None
+    return dispatch_channel_record(record, source, latency)
 
 # =====================
 # 网络请求处理
@@ -398,50 +561,809 @@ def get_random_user_agent():
     ]
     return random.choice(USER_AGENTS)
 
-def process_url(url):
+# =====================
+# HTTP缓存（ETag/Last-Modified条件请求）
+# =====================
+
+# 本次运行每个URL的缓存命中/未命中次数
+http_cache_stats = {}
+http_cache_lock = threading.Lock()
+
+def get_http_cache_paths(url):
+    key = hashlib.sha1(url.encode('utf-8')).hexdigest()
+    return os.path.join(HTTP_CACHE_DIR, key + '.body'), os.path.join(HTTP_CACHE_DIR, key + '.json')
+
+def load_http_cache(url):
+    body_path, meta_path = get_http_cache_paths(url)
+    if not (os.path.exists(body_path) and os.path.exists(meta_path)):
+        return None
+    try:
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"读取HTTP缓存失败: {url} {e}")
+        return None
+
+def read_text_file(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+# 先写临时文件再替换，避免并发或中断时留下半截缓存
+def write_file_atomic(path, data, mode='wb'):
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    encoding = None if 'b' in mode else 'utf-8'
+    with open(tmp_path, mode, encoding=encoding) as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+def save_http_cache(url, meta):
+    os.makedirs(HTTP_CACHE_DIR, exist_ok=True)
+    _, meta_path = get_http_cache_paths(url)
+    write_file_atomic(meta_path, json.dumps(meta, ensure_ascii=False, indent=1), 'w')
+
+# 响应超过大小上限或内容类型不是订阅内容
+class SourceRejectedError(Exception):
+    pass
+
+def get_fetch_max_bytes(url):
+    return FETCH_MAX_BYTES_PER_SOURCE.get(url, FETCH_MAX_BYTES)
+
+# 读取内容前先检查响应头：视频/音频/图片类型（m3u播放列表类型除外），或Content-Length已超过上限的直接中止
+def check_response_headers(response, max_bytes):
+    content_type = (response.headers.get('Content-Type') or '').strip().lower()
+    media_type = content_type.split(';', 1)[0].strip()  # 去掉charset等参数
+    if media_type.startswith(FETCH_REJECT_CONTENT_TYPES) and media_type not in FETCH_PLAYLIST_CONTENT_TYPES:
+        raise SourceRejectedError(f"内容类型不是订阅内容: {content_type}")
+    length = response.headers.get('Content-Length')
+    if length and length.strip().isdigit() and int(length) > max_bytes:
+        raise SourceRejectedError(f"Content-Length {length} 超过大小上限{max_bytes}字节")
+
+# 分块读取响应（按需解压gzip/deflate）并写入缓存文件，同时增量校验UTF-8（非法内容不会覆盖已有缓存）
+# 超过deadline（时间戳）、超过max_bytes或对冲请求中其他镜像已先完成（race）时中止，返回 (传输字节数, 解压后字节数, 内容sha256)
+def save_http_cache_body(url, response, deadline=None, race=None, max_bytes=None):
+    os.makedirs(HTTP_CACHE_DIR, exist_ok=True)
+    body_path, _ = get_http_cache_paths(url)
+    tmp_path = f"{body_path}.{threading.get_ident()}.tmp"
+    decompress, flush = net_tools.make_content_decoder(response.headers.get('Content-Encoding'))
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    digest = hashlib.sha256()
+    wire_size = 0
+    size = 0
+    try:
+        with open(tmp_path, 'wb') as f:
+            while True:
+                if deadline is not None and time.time() > deadline:
+                    raise TimeoutError("超过截止时间，下载中止")
+                if race is not None and race.is_set():
+                    raise concurrent.futures.CancelledError("其他镜像已先返回，下载中止")
+                chunk = response.read(FETCH_CHUNK_SIZE)
+                if not chunk:
+                    data = flush()
+                else:
+                    wire_size += len(chunk)
+                    data = decompress(chunk)
+                if max_bytes is not None and size + len(data) > max_bytes:
+                    raise SourceRejectedError(f"超过大小上限{max_bytes}字节，下载中止")
+                decoder.decode(data)
+                digest.update(data)
+                f.write(data)
+                size += len(data)
+                if not chunk:
+                    break
+            decoder.decode(b'', final=True)
+        if not claim_race(race):
+            raise concurrent.futures.CancelledError("其他镜像已先返回，下载中止")
+        os.replace(tmp_path, body_path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return wire_size, size, digest.hexdigest()
+
+def record_http_cache_result(url, meta, hit):
+    result = 'hit' if hit else 'miss'
+    meta[result + 's'] = meta.get(result + 's', 0) + 1  # 跨运行累计
+    with http_cache_lock:
+        stats = http_cache_stats.setdefault(url, {'hit': 0, 'miss': 0})
+        stats[result] += 1
+
+# 对冲请求中最先完成的请求才能写入缓存：返回True表示本请求胜出，之后其余请求都会中止
+hedge_lock = threading.Lock()
+
+def claim_race(race):
+    if race is None:
+        return True
+    with hedge_lock:
+        if race.is_set():
+            return False
+        race.set()
+        return True
+
+# 本次运行每个URL的传输字节数与解压后字节数
+transfer_stats = {}
+# 本次运行每个URL采用的请求从发出到收到响应头的时间（秒），用于计算对冲延迟
+source_response_times = {}
+
+def record_response_time(url, seconds):
+    with http_cache_lock:
+        source_response_times[url] = seconds
+
+def record_transfer_size(url, wire_size, size):
+    with http_cache_lock:
+        stats = transfer_stats.setdefault(url, {'wire': 0, 'decoded': 0})
+        stats['wire'] += wire_size
+        stats['decoded'] += size
+
+# 带缓存的下载：有缓存时发送If-None-Match/If-Modified-Since，服务器返回304则直接使用缓存内容
+# cache_url: 从镜像下载时使用主地址的缓存（镜像与主地址是同一文件），统计、快照等都按主地址记录
+# 返回缓存中的内容文件路径
+def fetch_url_cached(url, headers, timeout=None, read_timeout=None, deadline=None, cache_url=None, race=None):
+    fetch_url, url = url, cache_url or url
+    meta = load_http_cache(url)
+    body_path, _ = get_http_cache_paths(url)
+    headers = dict(headers)
+    headers['Accept-Encoding'] = 'gzip, deflate'  # 文本订阅压缩率很高，支持时按压缩格式传输
+    if meta:
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+
+    start_time = time.time()
+    try:
+        # 通过连接池请求，同一主机的多个订阅源复用连接
+        with net_tools.open_url(fetch_url, headers, timeout=timeout, read_timeout=read_timeout) as response:
+            response_seconds = time.time() - start_time
+            max_bytes = get_fetch_max_bytes(url)
+            check_response_headers(response, max_bytes)
+            wire_size, size, sha256 = save_http_cache_body(url, response, deadline, race, max_bytes)
+            etag = response.headers.get('ETag')
+            last_modified = response.headers.get('Last-Modified')
+            content_type = response.headers.get('Content-Type')
+    except urllib.error.HTTPError as e:
+        if e.code == 304 and meta:
+            if not claim_race(race):
+                raise concurrent.futures.CancelledError("其他镜像已先返回")
+            meta['validated_at'] = time.time()
+            record_response_time(url, meta['validated_at'] - start_time)
+            record_http_cache_result(url, meta, hit=True)
+            record_transfer_size(url, 0, meta.get('size', 0))
+            save_http_cache(url, meta)
+            record_fixture(url, body_path, 'not_modified', meta)
+            return body_path
+        raise
+
+    meta = meta or {'url': url}
+    meta['etag'] = etag
+    meta['last_modified'] = last_modified
+    meta['content_type'] = content_type
+    meta['fetched_from'] = fetch_url
+    meta['wire_size'] = wire_size
+    meta['size'] = size
+    meta['sha256'] = sha256
+    meta['fetched_at'] = meta['validated_at'] = time.time()
+    record_response_time(url, response_seconds)
+    record_http_cache_result(url, meta, hit=False)
+    record_transfer_size(url, wire_size, size)
+    save_http_cache(url, meta)
+    record_fixture(url, body_path, 'network', meta)
+    return body_path
+
+# =====================
+# 快照回退（stale-if-error）
+# =====================
+
+# 本次运行使用了快照的源: [(url, 快照时长秒)]
+snapshot_sources = []
+
+# 取最后一次成功的内容作为快照，返回内容文件路径，超过SNAPSHOT_MAX_AGE_HOURS则视为无效
+def load_snapshot(url):
+    if FIXTURE_MODE == 'replay':
+        return None  # 回放时只使用存档内容
+    meta = load_http_cache(url)
+    if not meta:
+        return None
+    age = time.time() - meta.get('validated_at', 0)
+    if age > SNAPSHOT_MAX_AGE_HOURS * 3600:
+        print(f"快照已过期: {url} ({age / 3600:.1f}小时)")
+        return None
+    with http_cache_lock:
+        if url not in [snapshot_url for snapshot_url, _ in snapshot_sources]:
+            print(f"使用快照: {url} ({age / 3600:.1f}小时前)")
+            snapshot_sources.append((url, age))
+    body_path, _ = get_http_cache_paths(url)
+    record_fixture(url, body_path, 'snapshot', meta)
+    return body_path
+
+def print_http_cache_stats():
+    print("HTTP缓存统计(本次命中/未命中):")
+    for url, stats in http_cache_stats.items():
+        print(f"  {stats['hit']}/{stats['miss']}  {url}")
+    hits = sum(stats['hit'] for stats in http_cache_stats.values())
+    total = hits + sum(stats['miss'] for stats in http_cache_stats.values())
+    print(f"HTTP缓存命中: {hits}/{total}")
+    for url, age in snapshot_sources:
+        print(f"快照回退: {url} ({age / 3600:.1f}小时前)")
+    print("传输统计(传输字节/解压后字节):")
+    for url, stats in transfer_stats.items():
+        print(f"  {stats['wire']}/{stats['decoded']}  {url}")
+    wire_total = sum(stats['wire'] for stats in transfer_stats.values())
+    decoded_total = sum(stats['decoded'] for stats in transfer_stats.values())
+    print(f"传输总字节: {wire_total}, 解压后总字节: {decoded_total}")
+
+# =====================
+# 录制/回放（离线基准测试）
+# =====================
+
+# 录制时：url -> 本次使用的内容及元数据；回放时：从存档的manifest.json读取
+fixture_sources = {}
+fixture_recorded_at = time.time()
+
+# 录制本次使用的内容（source: network/not_modified/snapshot），内容文件在运行结束时写入存档
+def record_fixture(url, body_path, source, meta=None):
+    if FIXTURE_MODE != 'record':
+        return
+    meta = meta or {}
+    with http_cache_lock:
+        fixture_sources[url] = {
+            'body_path': body_path,
+            'source': source,
+            'sha256': meta.get('sha256'),
+            'size': meta.get('size'),
+            'content_type': meta.get('content_type'),
+            'etag': meta.get('etag'),
+            'last_modified': meta.get('last_modified'),
+            'fetched_at': time.time(),
+        }
+
+# 写出存档：manifest.json记录录制时间和每个URL的元数据，内容按URL的sha1保存在bodies/下
+# 录制时下载失败的URL不在存档中，回放时同样按失败处理
+def save_fixture_archive(path):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    manifest = {'recorded_at': fixture_recorded_at, 'sources': {}}
+    tmp_path = f"{path}.tmp"
+    with zipfile.ZipFile(tmp_path, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for url, meta in fixture_sources.items():
+            meta = dict(meta)
+            name = 'bodies/' + hashlib.sha1(url.encode('utf-8')).hexdigest() + '.body'
+            archive.write(meta.pop('body_path'), name)
+            meta['file'] = name
+            manifest['sources'][url] = meta
+        archive.writestr('manifest.json', json.dumps(manifest, ensure_ascii=False, indent=1))
+    os.replace(tmp_path, path)
+    print(f"录制存档: {path} ({len(manifest['sources'])}个URL)")
+
+# 读取存档并把内容解压到FIXTURE_REPLAY_DIR，返回manifest
+def load_fixture_archive(path):
+    with zipfile.ZipFile(path) as archive:
+        manifest = json.loads(archive.read('manifest.json').decode('utf-8'))
+        for meta in manifest['sources'].values():
+            meta['body_path'] = archive.extract(meta['file'], FIXTURE_REPLAY_DIR)
+    print(f"回放存档: {path} ({len(manifest['sources'])}个URL, 录制于{datetime.fromtimestamp(manifest['recorded_at'])})")
+    return manifest
+
+# 回放：返回存档中该URL的内容文件路径，录制时没有成功下载的URL抛出URLError
+def replay_fixture(url):
+    meta = fixture_sources.get(url)
+    if meta is None:
+        raise urllib.error.URLError(f"回放存档中没有该URL: {url}")
+    return meta['body_path']
+
+# 当前时间：回放时使用录制时的时间，{MMdd}等按日期生成的URL和输出中的时间与录制时一致
+def current_datetime(tz=None):
+    if FIXTURE_MODE == 'replay':
+        return datetime.fromtimestamp(fixture_recorded_at, tz)
+    return datetime.now(tz)
+
+# 签名过期时间早于该时间的URL视为已过期（回放时按录制时间计算）
+def get_url_expiry_cutoff():
+    return current_datetime().timestamp() + URL_EXPIRY_MARGIN
+
+expired_url_stats = {'dropped': 0}
+
+if FIXTURE_MODE == 'replay':
+    fixture_manifest = load_fixture_archive(FIXTURE_ARCHIVE)
+    fixture_sources = fixture_manifest['sources']
+    fixture_recorded_at = fixture_manifest['recorded_at']
+    # 固定随机种子，今日推荐等随机选取的结果每次回放都相同
+    random.seed(fixture_recorded_at)
+url_expiry_cutoff = get_url_expiry_cutoff()
+
+# =====================
+# 镜像对冲请求
+# =====================
+
+source_mirrors = {}  # 主地址 -> [镜像地址]（urls-daily.txt中用|分隔）
+hedge_results = []   # [(主地址, 采用的地址, 发起的请求数)]
+# 所有网络请求（主地址和镜像）都在这个线程池中执行，订阅源线程只等待结果，两个线程池不会互相等待
+request_executor = ThreadPoolExecutor(max_workers=FETCH_MAX_WORKERS)
+
+# 按主机排队：同一主机进行中的请求达到FETCH_PER_HOST_LIMIT时，新请求在该主机的队列里等待，不占用下载线程，
+# 其他主机的请求照常执行（不会排在同一主机的请求后面）；某个请求结束时再从该主机的队列取下一个
+host_active = {}   # 主机 -> 进行中的请求数
+host_waiting = {}  # 主机 -> deque[(future, fn, args)]
+host_lock = threading.Lock()
+
+# 提交url所在主机的请求fn(*args)，返回Future（排队中的请求可以cancel）
+def submit_host_request(url, fn, *args):
+    host = urlparse(url).netloc.lower()
+    future = concurrent.futures.Future()
+    with host_lock:
+        host_waiting.setdefault(host, collections.deque()).append((future, fn, args))
+    start_host_requests(host)
+    return future
+
+# 在该主机的并发上限内，把排队的请求交给线程池执行
+def start_host_requests(host):
+    while True:
+        with host_lock:
+            waiting = host_waiting.get(host)
+            if not waiting or host_active.get(host, 0) >= FETCH_PER_HOST_LIMIT:
+                return
+            future, fn, args = waiting.popleft()
+            if not future.set_running_or_notify_cancel():
+                continue  # 排队时已被取消
+            host_active[host] = host_active.get(host, 0) + 1
+        try:
+            request_executor.submit(run_host_request, host, future, fn, args)
+        except RuntimeError as e:  # 线程池已关闭（超过截止时间后）
+            finish_host_request(host)
+            future.set_exception(e)
+
+def run_host_request(host, future, fn, args):
+    try:
+        result = fn(*args)
+    except BaseException as e:
+        finish_host_request(host)
+        future.set_exception(e)
+    else:
+        finish_host_request(host)
+        future.set_result(result)
+
+def finish_host_request(host):
+    with host_lock:
+        host_active[host] -= 1
+    start_host_requests(host)
+
+# 对冲延迟：该源历史响应时间的HEDGE_PERCENTILE分位数，样本不足时用所有源的，仍不足时用默认值
+# 用响应时间而不是整个下载耗时：内容很大但响应很快的源，下载耗时会让对冲延迟过长，慢响应时镜像请求迟迟不发出
+# （旧记录没有response_seconds，不计入样本）；样本来自下载开始前的快照hedge_samples/all_hedge_samples
+def get_hedge_delay(url):
+    samples = hedge_samples.get(url, [])
+    if len(samples) < HEDGE_MIN_SAMPLES:
+        samples = all_hedge_samples
+    if len(samples) < HEDGE_MIN_SAMPLES:
+        return HEDGE_DEFAULT_DELAY
+    delay = samples[min(len(samples) - 1, int(len(samples) * HEDGE_PERCENTILE / 100))]
+    return min(max(delay, HEDGE_MIN_DELAY), FETCH_READ_TIMEOUT)
+
+# 从fetch_url下载url的内容（fetch_url为主地址或镜像地址），受截止时间限制；通过submit_host_request执行，受所在主机的并发上限限制
+def fetch_source_attempt(fetch_url, url, headers, race=None):
+    remaining = fetch_deadline - time.time()
+    if remaining <= 0:
+        raise TimeoutError("超过截止时间，未开始下载")
+    if race is not None and race.is_set():
+        raise concurrent.futures.CancelledError("其他镜像已先返回")
+    # 打开URL并读取内容（带缓存），超时不超过剩余时间
+    return fetch_url_cached(fetch_url, headers,
+                            timeout=min(FETCH_CONNECT_TIMEOUT, remaining),
+                            read_timeout=min(FETCH_READ_TIMEOUT, remaining),
+                            deadline=fetch_deadline, cache_url=url, race=race)
+
+# 依次向主地址和镜像发起请求：上一个请求超过对冲延迟未返回或已失败时发起下一个，返回最先成功的结果
+def fetch_with_hedging(url, headers):
+    candidates = [url] + source_mirrors.get(url, [])
+    if len(candidates) == 1:
+        return submit_host_request(url, fetch_source_attempt, url, url, headers).result()
+
+    race = threading.Event()  # 有请求胜出后置位，其余请求在下一个数据块时中止
+    delay = get_hedge_delay(url)
+    attempts = {}  # future -> 请求地址
+    errors = []
+    def start_next():
+        fetch_url = candidates[len(attempts)]
+        future = submit_host_request(fetch_url, fetch_source_attempt, fetch_url, url, headers, race)
+        attempts[future] = fetch_url
+        return future
+    pending = {start_next()}
+    while pending:
+        more = len(attempts) < len(candidates)
+        done, pending = concurrent.futures.wait(pending, timeout=delay if more else None,
+                                                return_when=concurrent.futures.FIRST_COMPLETED)
+        for future in done:
+            try:
+                body_path = future.result()
+            except Exception as e:
+                print(f"镜像请求失败: {attempts[future]} {e}")
+                errors.append(e)
+                continue
+            for other in pending:
+                other.cancel()  # 还没开始的请求直接取消，进行中的请求由race中止
+            hedge_results.append((url, attempts[future], len(attempts)))
+            return body_path
+        # 走到这里说明超过对冲延迟未返回，或完成的请求都失败了，发起下一个请求
+        if more:
+            if not done:
+                print(f"对冲请求: {candidates[len(attempts)]} ({delay:.2f}s内未返回)")
+            pending.add(start_next())
+    raise errors[-1]
+
+# 下载订阅源内容（在线程池中执行），返回内容文件路径
+def fetch_url_body(url):
+    if FIXTURE_MODE == 'replay':
+        return replay_fixture(url)
+
+    # 自定义header
+    headers = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3'
+    }
+
+    # 多次超过大小上限或内容类型不符被停用的源不下载，有快照时使用快照
+    if is_source_blocked(url):
+        print(f"已停用的源，不下载: {url} ({source_stats[url]['blocked_reason']})")
+        body_path = load_snapshot(url)
+        if body_path is None:
+            raise SourceRejectedError(f"源已停用: {url}")
+        return body_path
+
+    # 低产出降级中的源不下载，直接使用快照（没有可用快照时照常下载）
+    if is_source_demoted(url):
+        body_path = load_snapshot(url)
+        if body_path is not None:
+            demoted_sources.append(url)
+            return body_path
+
+    start_time = time.time()
+    try:
+        body_path = fetch_with_hedging(url, headers)
+        source_fetch_times[url] = time.time() - start_time
+        clear_source_rejections(url)
+    except Exception as e:
+        if time.time() >= fetch_deadline:
+            record_deadline_cut(url)
+        if isinstance(e, SourceRejectedError):
+            record_source_rejection(url, str(e))
+        # 下载失败时使用最后一次成功的快照，没有可用快照才算失败
+        print(f"下载失败: {url} {e}")
+        body_path = load_snapshot(url)
+        if body_path is None:
+            raise
+    print(f"下载完成: {url} 耗时: {time.time() - start_time:.2f}s")
+    return body_path
+
+# =====================
+# 下载/分类流水线
+# =====================
+
+# 流水线统计：分类时队列中等待的源数量、下载阶段因队列已满的等待时间、分类阶段等待下载的时间、分类耗时
+pipeline_stats = {'depth': [], 'fetch_stall': 0.0, 'classify_stall': 0.0, 'classify_time': 0.0}
+
+# 下载阶段（单独线程）：按urls顺序提交下载并放入有界队列，队列满时阻塞，不再提交新的下载
+def fetch_stage(executor, urls, fetch_queue):
+    try:
+        for url in urls:
+            future = executor.submit(fetch_url_body, url)
+            start_time = time.time()
+            fetch_queue.put((url, future))
+            pipeline_stats['fetch_stall'] += time.time() - start_time
+    finally:
+        fetch_queue.put(None)  # 结束标记
+
+# 分类阶段（主线程）：按顺序从队列取出源，等待其下载完成后分类，保证输出顺序稳定
+def classify_stage(fetch_queue):
+    while True:
+        start_time = time.time()
+        item = fetch_queue.get()
+        pipeline_stats['classify_stall'] += time.time() - start_time
+        if item is None:
+            break
+        pipeline_stats['depth'].append(fetch_queue.qsize())
+        url, future = item
+        print(f"处理URL: {url}")
+        start_time = time.time()
+        stall_before = pipeline_stats['classify_stall']
+        process_url(url, future)  # 其中等待下载的时间计入classify_stall
+        pipeline_stats['classify_time'] += time.time() - start_time - (pipeline_stats['classify_stall'] - stall_before)
+
+def print_pipeline_stats():
+    depth = pipeline_stats['depth'] or [0]
+    print(f"流水线统计: 队列深度 平均{sum(depth) / len(depth):.1f} 最大{max(depth)} (上限{FETCH_QUEUE_SIZE}), "
+          f"分类等待下载 {pipeline_stats['classify_stall']:.2f}s, 下载等待分类 {pipeline_stats['fetch_stall']:.2f}s, "
+          f"分类耗时 {pipeline_stats['classify_time']:.2f}s")
+
+# =====================
+# 相同内容的订阅源去重
+# =====================
+
+processed_body_digests = {}  # (内容sha256, 是否按m3u解析) -> 第一个处理该内容的URL
+duplicate_sources = []       # [(重复的URL, 相同内容的URL)]
+
+# 取内容的sha256：优先用下载时记录在缓存中的值，没有则读文件计算
+def get_body_digest(url, body_path):
+    meta = load_http_cache(url) if body_path == get_http_cache_paths(url)[0] else None
+    if meta and meta.get('sha256'):
+        return meta['sha256']
+    digest = hashlib.sha256()
+    with open(body_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(FETCH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+# 本次运行因截止时间被截断的源
+deadline_cut_sources = []
+
+def record_deadline_cut(url):
+    with http_cache_lock:
+        if url not in deadline_cut_sources:
+            deadline_cut_sources.append(url)
+
+# 等待下载结果，最多等到截止时间；仍未完成则取消该下载并改用快照
+def wait_fetch_result(url, future):
+    start_time = time.time()
+    try:
+        return future.result(timeout=max(fetch_deadline - time.time(), 0))
+    except concurrent.futures.TimeoutError:
+        future.cancel()
+        record_deadline_cut(url)
+        print(f"超过截止时间，取消下载: {url}")
+        body_path = load_snapshot(url)
+        if body_path is None:
+            raise TimeoutError(f"超过截止时间且没有可用快照: {url}")
+        return body_path
+    finally:
+        pipeline_stats['classify_stall'] += time.time() - start_time
+
+# =====================
+# 订阅源产出统计与降级
+# =====================
+
+source_fetch_times = {}      # url -> 本次实际下载的耗时（秒），降级或使用快照的源不在其中
+classified_urls = set()      # 本次运行已归入分类的URL（去重键），用于计算每个源新增的URL
+source_yield_summary = []    # [(url, 本次统计)]
+demoted_sources = []         # 本次因低产出而使用快照的源
+
+# 读取历史统计，并把上次各源新增的URL中本次已在黑名单里的数量（blacklist.py检测失效）记到上次的记录上
+def load_source_stats():
+    try:
+        with open(SOURCE_STATS_FILE, 'r', encoding='utf-8') as f:
+            stats = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        print(f"读取订阅源统计失败: {e}")
+        return {}
+    for entry in stats.values():
+        if entry.get('runs') and 'last_urls' in entry:
+            entry['runs'][-1]['dead_urls'] = sum(1 for url in entry['last_urls'] if net_tools.canonical_url_key(url) in combined_blacklist)
+    return stats
+
+def save_source_stats():
+    os.makedirs(os.path.dirname(SOURCE_STATS_FILE), exist_ok=True)
+    with http_cache_lock:
+        data = json.dumps(source_stats, ensure_ascii=False)
+    write_file_atomic(SOURCE_STATS_FILE, data, 'w')
+
+# 回放时不读写统计，避免降级影响回放结果
+# 下载线程也会增删source_stats的条目（中止计数），所有写入都在http_cache_lock内进行
+source_stats = load_source_stats() if FIXTURE_MODE != 'replay' else {}
+
+# 对冲延迟用的历史响应时间（已排序），在下载开始前取出一次：{url: [秒]} 和所有源的样本
+# 下载线程只读这份快照，不遍历其他线程正在修改的source_stats
+hedge_samples = {url: sorted(run['response_seconds'] for run in entry.get('runs', []) if 'response_seconds' in run)
+                 for url, entry in source_stats.items()}
+all_hedge_samples = sorted(seconds for samples in hedge_samples.values() for seconds in samples)
+
+# 连续被中止的次数未达到SOURCE_BLOCK_AFTER的不算停用（包括只被中止过一次就写入了blocked_until的旧记录）
+def is_source_blocked(url):
+    entry = source_stats.get(url)
+    return (entry is not None and entry.get('rejections', 0) >= SOURCE_BLOCK_AFTER
+            and entry.get('blocked_until', 0) > time.time())
+
+# 记录一次超过大小上限或内容类型不符的中止，连续SOURCE_BLOCK_AFTER次时停用该源SOURCE_BLOCK_DAYS天
+# 只中止一次不停用：服务器临时返回错误页面、或类型配置不当（如m3u以其他音频类型返回）时，下次运行照常下载
+blocked_sources = []  # 本次被停用的源: [(url, 原因)]
+
+def record_source_rejection(url, reason):
+    with http_cache_lock:
+        entry = source_stats.setdefault(url, {'runs': []})
+        entry['rejections'] = rejections = entry.get('rejections', 0) + 1
+        entry['blocked_reason'] = reason
+        if rejections >= SOURCE_BLOCK_AFTER:
+            entry['blocked_until'] = time.time() + SOURCE_BLOCK_DAYS * 86400
+            blocked_sources.append((url, reason))
+    if rejections < SOURCE_BLOCK_AFTER:
+        print(f"源被中止({rejections}/{SOURCE_BLOCK_AFTER}次): {url} ({reason})")
+
+# 下载成功后清零连续中止次数
+def clear_source_rejections(url):
+    with http_cache_lock:
+        entry = source_stats.get(url)
+        if entry is not None:
+            for key in ('rejections', 'blocked_until', 'blocked_reason'):
+                entry.pop(key, None)
+
+def is_source_demoted(url):
+    entry = source_stats.get(url)
+    return entry is not None and entry.get('demoted_until', 0) > time.time()
+
+def collect_new_url(channel_address, new_urls):
+    if channel_address and channel_address not in classified_urls:
+        classified_urls.add(channel_address)
+        new_urls.append(channel_address)
+
+# 该源的签名URL统计：(URL数, 其中带过期参数的URL数, 其中已过期的数量, 未过期URL剩余有效期的中位数秒数或None)
+# 都按行级记录（按#拆分后、去掉重复行的直播源URL）计数，签名URL的占比才有意义
+def get_token_stats(line_records):
+    expiries = [line_record[1] for line_record in line_records.values() if line_record[1] is not None]
+    remaining = sorted(expiry - url_expiry_cutoff for expiry in expiries if expiry > url_expiry_cutoff)
+    token_ttl = int(remaining[len(remaining) // 2]) + URL_EXPIRY_MARGIN if remaining else None
+    return len(line_records), len(expiries), len(expiries) - len(remaining), token_ttl
+
+# 记录本次下载的产出，并根据最近几次的记录决定是否降级
+# 过半URL带签名参数的源，降级时长不超过签名剩余有效期的中位数，过期后照常重新下载
+def record_source_yield(url, line_count, new_urls, token_stats=(0, 0, 0, None)):
+    if url not in source_fetch_times:
+        return
+    url_count, signed_urls, expired_urls, token_ttl = token_stats
+    transfer = transfer_stats.get(url, {'wire': 0, 'decoded': 0})
+    run = {
+        'time': int(time.time()),
+        'fetch_seconds': round(source_fetch_times[url], 3),
+        'wire_bytes': transfer['wire'],
+        'bytes': transfer['decoded'],
+        'lines': line_count,
+        'new_urls': len(new_urls),
+        'dead_urls': 0,  # 下次运行时根据黑名单更新
+        'signed_urls': signed_urls,
+        'expired_urls': expired_urls,
+        'token_ttl': token_ttl,
+    }
+    if url in source_response_times:
+        run['response_seconds'] = round(source_response_times[url], 3)
+    with http_cache_lock:
+        entry = source_stats.setdefault(url, {'runs': []})
+        entry['runs'].append(run)
+        del entry['runs'][:-SOURCE_STATS_HISTORY]
+        entry['last_urls'] = new_urls
+    source_yield_summary.append((url, run))
+
+    recent = entry['runs'][-SOURCE_DEMOTE_WINDOW:]
+    entry.pop('demoted_until', None)
+    if len(recent) < SOURCE_DEMOTE_WINDOW:
+        return
+    avg_yield = sum(r['new_urls'] - r['dead_urls'] for r in recent) / len(recent)
+    avg_seconds = sum(r['fetch_seconds'] for r in recent) / len(recent)
+    if avg_yield < SOURCE_DEMOTE_MIN_YIELD and avg_seconds >= SOURCE_DEMOTE_MIN_SECONDS:
+        demote_seconds = SOURCE_DEMOTE_HOURS * 3600
+        if token_ttl is not None and signed_urls * 2 > url_count:
+            demote_seconds = min(demote_seconds, token_ttl)
+        entry['demoted_until'] = time.time() + demote_seconds
+        print(f"低产出源降级{demote_seconds / 3600:.1f}小时: {url} (平均有效新增{avg_yield:.1f}, 平均耗时{avg_seconds:.2f}s)")
+
+def print_source_yield_stats():
+    print("订阅源产出统计(耗时/传输字节/解压后字节/行数/新增URL/上次新增中失效/签名URL/签名已过期):")
+    for url, run in source_yield_summary:
+        runs = source_stats[url]['runs']
+        last_dead = runs[-2]['dead_urls'] if len(runs) > 1 else '-'
+        print(f"  {run['fetch_seconds']:.2f}s/{run['wire_bytes']}/{run['bytes']}/{run['lines']}/{run['new_urls']}/{last_dead}"
+              f"/{run['signed_urls']}/{run['expired_urls']}  {url}")
+    print(f"签名已过期丢弃的URL: {expired_url_stats['dropped']}")
+    for url in demoted_sources:
+        print(f"低产出降级中，使用快照: {url} (至{datetime.fromtimestamp(source_stats[url]['demoted_until'])})")
+    for url, reason in blocked_sources:
+        print(f"停用{SOURCE_BLOCK_DAYS}天: {url} ({reason})")
+
+# =====================
+# 行级增量处理
+# =====================
+
+def get_line_records_path(url):
+    return os.path.join(LINE_RECORD_DIR, hashlib.sha1(url.encode('utf-8')).hexdigest() + '.json')
+
+# 行级记录的键：整行（"频道名称,URL"）的64位摘要，比保存整行小得多；10万行的源发生碰撞的概率约为十亿分之一
+def get_line_key(channel_name, channel_address):
+    return hashlib.blake2b(f"{channel_name},{channel_address}".encode('utf-8'), digest_size=8).hexdigest()
+
+# 读取该源上次的行级记录 {行的摘要: [URL去重键（与URL相同时为None）, 签名过期时间]}，只有直播源行才有记录
+# 规则指纹不一致或是旧格式（保存整行和完整结果的'records'）时视为没有
+def load_line_records(url):
+    try:
+        with open(get_line_records_path(url), 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        print(f"读取行级记录失败: {url} {e}")
+        return {}
+    if data.get('fingerprint') != rules_fingerprint or 'lines' not in data:
+        return {}
+    return data['lines']
+
+def save_line_records(url, line_records):
+    os.makedirs(LINE_RECORD_DIR, exist_ok=True)
+    data = {'url': url, 'fingerprint': rules_fingerprint, 'lines': line_records}
+    write_file_atomic(get_line_records_path(url), json.dumps(data, ensure_ascii=False, separators=(',', ':')), 'w')
+
+# 读取上次保存的频道名称缓存，规则指纹不一致时视为没有
+def load_name_cache():
+    try:
+        with open(NAME_CACHE_FILE, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        print(f"读取名称缓存失败: {e}")
+        return {}
+    if data.get('fingerprint') != rules_fingerprint:
+        return {}
+    return data['names']
+
+# 只保存本次运行用到的名称，缓存大小随订阅内容而不是运行次数增长
+def save_name_cache():
+    names = {name: name_cache[name] for name in used_names}
+    data = {'fingerprint': rules_fingerprint, 'names': names}
+    os.makedirs(os.path.dirname(NAME_CACHE_FILE), exist_ok=True)
+    write_file_atomic(NAME_CACHE_FILE, json.dumps(data, ensure_ascii=False, separators=(',', ':')), 'w')
+
+used_names = set()                         # 本次运行用到的原始名称
+name_cache_stats = {'hit': 0, 'miss': 0}
+
+# 处理一个频道：上次已有的行复用URL的解析结果（名称查名称缓存，同样记为本次用到），新增的行才解析URL，
+# 分发（去重、存入分类）每次都按顺序进行；复用的记录从previous_records中取出，处理完后剩下的就是已移除的行
+def ingest_channel(channel_name, channel_address, previous_records, line_records, source):
+    line_key = get_line_key(channel_name, channel_address)
+    line_record = line_records.get(line_key)
+    if line_record is None:
+        line_record = previous_records.pop(line_key, None)
+    record = normalize_channel(channel_name, channel_address, line_record)
+    if record is None:
+        return None
+    line_records[line_key] = line_record or [None if record[2] == record[1] else record[2], record[6]]
+    return dispatch_channel_record(record, source)
+
+def process_url(url, future):
     try:
         other_lines.append("◆◆◆　"+url)  # 记录处理的URL存入other_lines便于check 2025-07-20 13:14
-        
-        # 创建一个请求对象并添加自定义header
-        req = urllib.request.Request(url)
-        req.add_header('User-Agent', 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3')
-
-        # 打开URL并读取内容
-        with urllib.request.urlopen(req) as response:
-            # 以二进制方式读取数据
-            data = response.read()
-            # 将二进制数据解码为字符串
-            text = data.decode('utf-8')
-            text = text.strip()
-            # channel_name=""
-            # channel_address=""
-
-            #处理m3u和m3u8，提取channel_name和channel_address
-            #增加扩展名非m3u和m3u8为扩展名的m3u格式            
-            is_m3u = text.startswith("#EXTM3U") or text.startswith("#EXTINF")
-            if get_url_file_extension(url)==".m3u" or get_url_file_extension(url)==".m3u8" or is_m3u:
-                text=convert_m3u_to_txt(text)
-
-            # 逐行处理内容
-            lines = text.split('\n')
-            print(f"行数: {len(lines)}")
-            for line in lines:
-                if  "#genre#" not in line and "," in line and "://" in line and "tvbus://" not in line and "/udp/" not in line:
-                    # tvbus://剔除tvbus
-                    # /udp/剔除组播
-                    # 拆分成频道名和URL部分
-                    channel_name, channel_address = line.split(',', 1)
-                    #需要加处理带#号源=予加速源
-                    if "#" not in channel_address:
-                        process_channel_line(line) # 如果没有井号，则照常按照每行规则进行分发
-                    else: 
-                        # 如果有“#”号，则根据“#”号分隔
-                        url_list = channel_address.split('#')
-                        for channel_url in url_list:
-                            newline=f'{channel_name},{channel_url}'
-                            process_channel_line(newline)
-
-            other_lines.append('\n') #每个url处理完成后，在other_lines加个回车 2025-07-20 13:14
+
+        # 等待该URL的并发下载结果（下载中的异常会在这里抛出），得到内容文件路径
+        body_path = wait_fetch_result(url, future)
+        is_m3u_url = get_url_file_extension(url)==".m3u" or get_url_file_extension(url)==".m3u8"
+
+        # 镜像/转发的源内容完全相同时只处理一次
+        body_key = (get_body_digest(url, body_path), is_m3u_url)
+        if body_key in processed_body_digests:
+            same_url = processed_body_digests[body_key]
+            print(f"内容与已处理的源相同，跳过: {same_url}")
+            duplicate_sources.append((url, same_url))
+            other_lines.append('\n')
+            record_source_yield(url, 0, [])
+            return
+        processed_body_digests[body_key] = url
+
+        # 逐行处理内容（流式读取，边读边分发）
+        line_count = 0
+        new_urls = []  # 该源新增（之前的源没有）并归入分类的URL
+        previous_records = load_line_records(url)  # 上次运行的行级记录，复用的逐个取出
+        previous_count = len(previous_records)
+        line_records = {}                          # 本次的行级记录，处理完成后保存
+        for channel_name, channel_address in iter_source_channels(body_path, is_m3u_url):
+            line_count += 1
+            #需要加处理带#号源=予加速源
+            if "#" not in channel_address:
+                collect_new_url(ingest_channel(channel_name, channel_address, previous_records, line_records, url), new_urls) # 如果没有井号，则照常按照每行规则进行分发
+            else: 
+                # 如果有“#”号，则根据“#”号分隔
+                url_list = channel_address.split('#')
+                for channel_url in url_list:
+                    collect_new_url(ingest_channel(channel_name, channel_url, previous_records, line_records, url), new_urls)
+        reused = previous_count - len(previous_records)
+        print(f"有效行数: {line_count}, 新增URL: {len(new_urls)}, "
+              f"复用行: {reused}, 新处理行: {len(line_records) - reused}, 移除行: {len(previous_records)}")
+        del previous_records
+        save_line_records(url, line_records)
+        record_source_yield(url, line_count, new_urls, get_token_stats(line_records))
+
+        other_lines.append('\n') #每个url处理完成后，在other_lines加个回车 2025-07-20 13:14
 
     except Exception as e:
         print(f"处理URL时发生错误：{e}")
@@ -506,6 +1428,157 @@ zy_dictionary=read_txt_to_array('scripts/livesource3/主频道/综艺频道.txt'
 game_dictionary=read_txt_to_array('scripts/livesource3/主频道/游戏频道.txt') #过滤+排序
 xq_dictionary=read_txt_to_array('scripts/livesource3/主频道/戏曲频道.txt') #过滤+排序
 
+# 分类规则（按优先级排列）：(分类key, 存储列表, 字典)
+# 频道名在字典中即匹配；央视频道按名称包含"CCTV"匹配，体育赛事按名称包含字典中任一关键字匹配
+channel_category_rules = [
+    ('ys', ys_lines, ys_dictionary),              #央视频道
+    ('ws', ws_lines, ws_dictionary),              #卫视频道
+    ('zj', zj_lines, zj_dictionary),              #scripts/livesource3/地方台-浙江频道
+    ('jsu', jsu_lines, jsu_dictionary),           #scripts/livesource3/地方台-江苏频道
+    ('gd', gd_lines, gd_dictionary),              #scripts/livesource3/地方台-广东频道
+    ('hn', hn_lines, hn_dictionary),              #scripts/livesource3/地方台-湖南频道
+    ('hb', hb_lines, hb_dictionary),              #scripts/livesource3/地方台-湖北频道
+    ('ah', ah_lines, ah_dictionary),              #scripts/livesource3/地方台-安徽频道
+    ('hain', hain_lines, hain_dictionary),        #scripts/livesource3/地方台-海南频道
+    ('nm', nm_lines, nm_dictionary),              #scripts/livesource3/地方台-内蒙频道
+    ('ln', ln_lines, ln_dictionary),              #scripts/livesource3/地方台-辽宁频道
+    ('sx', sx_lines, sx_dictionary),              #scripts/livesource3/地方台-陕西频道
+    ('shanxi', shanxi_lines, shanxi_dictionary),  #scripts/livesource3/地方台-山西频道
+    ('shandong', shandong_lines, shandong_dictionary),  #scripts/livesource3/地方台-山东频道
+    ('yunnan', yunnan_lines, yunnan_dictionary),  #scripts/livesource3/地方台-云南频道
+    ('bj', bj_lines, bj_dictionary),              #scripts/livesource3/地方台-北京频道
+    ('cq', cq_lines, cq_dictionary),              #scripts/livesource3/地方台-重庆频道
+    ('fj', fj_lines, fj_dictionary),              #scripts/livesource3/地方台-福建频道
+    ('gs', gs_lines, gs_dictionary),              #scripts/livesource3/地方台-甘肃频道
+    ('gx', gx_lines, gx_dictionary),              #scripts/livesource3/地方台-广西频道
+    ('gz', gz_lines, gz_dictionary),              #scripts/livesource3/地方台-贵州频道
+    ('heb', heb_lines, heb_dictionary),           #scripts/livesource3/地方台-河北频道
+    ('hen', hen_lines, hen_dictionary),           #scripts/livesource3/地方台-河南频道
+    ('hlj', hlj_lines, hlj_dictionary),           #scripts/livesource3/地方台-黑龙江频道
+    ('jl', jl_lines, jl_dictionary),              #scripts/livesource3/地方台-吉林频道
+    ('nx', nx_lines, nx_dictionary),              #scripts/livesource3/地方台-宁夏频道
+    ('jx', jx_lines, jx_dictionary),              #scripts/livesource3/地方台-江西频道
+    ('qh', qh_lines, qh_dictionary),              #scripts/livesource3/地方台-青海频道
+    ('sc', sc_lines, sc_dictionary),              #scripts/livesource3/地方台-四川频道
+    ('sh', sh_lines, sh_dictionary),              #scripts/livesource3/地方台-上海频道
+    ('tj', tj_lines, tj_dictionary),              #scripts/livesource3/地方台-天津频道
+    ('xj', xj_lines, xj_dictionary),              #scripts/livesource3/地方台-新疆频道
+    ('sz', sz_lines, sz_dictionary),              #数字频道
+    ('gj', gj_lines, gj_dictionary),              #国际频道
+    ('ty', ty_lines, ty_dictionary),              #体育频道
+    ('tyss', tyss_lines, tyss_dictionary),        #体育赛事
+    ('dy', dy_lines, dy_dictionary),              #电影
+    ('dsj', dsj_lines, dsj_dictionary),           #电视剧
+    ('gat', gat_lines, gat_dictionary),           #港澳台
+    ('xg', xg_lines, xg_dictionary),              #香港
+    ('aomen', aomen_lines, aomen_dictionary),     #澳门
+    ('tw', tw_lines, tw_dictionary),              #台湾
+    ('jlp', jlp_lines, jlp_dictionary),           #纪录片
+    ('dhp', dhp_lines, dhp_dictionary),           #动画片
+    ('xq', xq_lines, xq_dictionary),              #戏曲
+    ('js', js_lines, js_dictionary),              #解说
+    ('cw', cw_lines, cw_dictionary),              #春晚
+    ('douyu', douyu_lines, douyu_dictionary),     #斗鱼直播
+    ('huya', huya_lines, huya_dictionary),        #虎牙直播
+    ('zy', zy_lines, zy_dictionary),              #综艺频道
+    ('yy', yy_lines, yy_dictionary),              #音乐频道
+    ('game', game_lines, game_dictionary),        #游戏频道
+    ('radio', radio_lines, radio_dictionary),     #收音机
+    ('zb', zb_lines, zb_dictionary),              #直播中国
+]
+category_lines = {key: lines for key, lines, _ in channel_category_rules}
+# 每个分类已有的URL去重键，与category_lines同步追加；列表保留先到先得的顺序，集合只用于判断是否重复
+category_url_keys = {key: set() for key, _, _ in channel_category_rules}
+category_keys = [key for key, _, _ in channel_category_rules]
+ys_rule_position = category_keys.index('ys')
+tyss_rule_position = category_keys.index('tyss')
+
+# 所有按名称精确匹配的字典合并成一个索引：频道名 -> 所在分类的优先级位置（升序），分类时一次哈希查找代替逐个字典的列表扫描
+def build_category_index():
+    index = {}
+    for position, (key, _, dictionary) in enumerate(channel_category_rules):
+        if position in (ys_rule_position, tyss_rule_position):
+            continue
+        for name in dictionary:
+            positions = index.setdefault(name, [])
+            if positions[-1:] != [position]:
+                positions.append(position)
+    return {name: tuple(positions) for name, positions in index.items()}
+
+category_index = build_category_index()
+
+# 体育赛事的关键字编译成Aho-Corasick自动机，一次扫描名称即可判断是否包含任一关键字，耗时与关键字数量无关
+# goto[状态][字符]为字典树的转移，fail为失配时退回的状态，matched表示到达该状态时已包含某个关键字
+def build_keyword_matcher(keywords):
+    goto, fail, matched = [{}], [0], [False]
+    for keyword in keywords:
+        state = 0
+        for char in keyword:
+            next_state = goto[state].get(char)
+            if next_state is None:
+                next_state = goto[state][char] = len(goto)
+                goto.append({})
+                fail.append(0)
+                matched.append(False)
+            state = next_state
+        matched[state] = True
+    # 按层（广度优先）计算失配状态，关键字的后缀也是关键字时同样算命中
+    pending = collections.deque(goto[0].values())
+    while pending:
+        state = pending.popleft()
+        for char, next_state in goto[state].items():
+            pending.append(next_state)
+            fallback = fail[state]
+            while fallback and char not in goto[fallback]:
+                fallback = fail[fallback]
+            fail[next_state] = goto[fallback].get(char, 0) if state else 0
+            matched[next_state] = matched[next_state] or matched[fail[next_state]]
+
+    def contains_keyword(text):
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if matched[state]:
+                return True
+        return False
+    return contains_keyword
+
+contains_tyss_keyword = build_keyword_matcher(tyss_dictionary)
+
+# 返回频道名可归入的所有分类key（按优先级），前面的分类已有相同URL时依次归入后面的分类
+# 传入多个名称（如原名称和纠错后的模板名称）时，返回任一名称可归入的分类
+def channel_categories(*channel_names):
+    positions = set()
+    for channel_name in set(channel_names):
+        positions.update(category_index.get(channel_name, ()))
+        # 央视频道、体育赛事按包含关系匹配，不在索引中
+        if "CCTV" in channel_name:
+            positions.add(ys_rule_position)
+        if contains_tyss_keyword(channel_name):
+            positions.add(tyss_rule_position)
+    return [category_keys[position] for position in sorted(positions)]
+
+# 分类规则指纹：本脚本、名称规则、纠错文件、简繁转换词典和所有分类字典的内容，任一变化时行级记录和名称缓存全部失效
+def get_rules_fingerprint():
+    digest = hashlib.sha256()
+    for filename in (__file__, NAME_RULES_FILE, CORRECTIONS_NAME_FILE):
+        with open(filename, 'rb') as f:
+            digest.update(f.read())
+    opencc_dictionary_dir = os.path.join(os.path.dirname(opencc.__file__), 'dictionary')
+    for filename in ('TSPhrases.txt', 'TSCharacters.txt'):
+        try:
+            with open(os.path.join(opencc_dictionary_dir, filename), 'rb') as f:
+                digest.update(f.read())
+        except OSError:
+            digest.update(getattr(opencc, '__version__', '').encode('utf-8'))
+    digest.update(json.dumps([(key, dictionary) for key, _, dictionary in channel_category_rules], ensure_ascii=False).encode('utf-8'))
+    return digest.hexdigest()
+
+rules_fingerprint = get_rules_fingerprint()
+name_cache = load_name_cache()
+
 #读取纠错频道名称方法
 def load_corrections_name(filename):
     corrections = {}
@@ -519,26 +1592,25 @@ def load_corrections_name(filename):
                 corrections[name] = correct_name
     return corrections
 
-#读取纠错文件
-corrections_name = load_corrections_name('scripts/livesource3/corrections_name.txt')
+#读取纠错文件（别名 -> 模板名称）
+corrections_name = load_corrections_name(CORRECTIONS_NAME_FILE)
+
+#别名换成模板名称，不是别名的原样返回
+def correct_channel_name(name):
+    return corrections_name.get(name, name)
 
 #纠错频道名称
 #correct_name_data(corrections_name,xxxx)
 def correct_name_data(corrections, data):
     corrected_data = []
-    for line in data:
-        line = line.strip()
-        if ',' not in line:
-            # 行格式错误：跳过或记录
-            continue
-
-        name, url = line.split(',', 1)
+    for record in data:
+        name = record.name
 
         # 空 name 处理（可选）
         if name in corrections and name != corrections[name]:
-            name = corrections[name]
+            record = record.renamed(corrections[name])
 
-        corrected_data.append(f"{name},{url}")
+        corrected_data.append(record)
     return corrected_data
 
 
@@ -546,10 +1618,10 @@ def sort_data(order, data):
     # 创建一个字典来存储每行数据的索引
     order_dict = {name: i for i, name in enumerate(order)}
     
-    # 定义一个排序键函数，处理不在 order_dict 中的字符串
-    def sort_key(line):
-        name = line.split(',')[0]
-        return order_dict.get(name, len(order))
+    # 定义一个排序键函数，处理不在 order_dict 中的名称
+    # 同名的按"名称,URL"排序：传入的多是set，迭代顺序随字符串哈希种子变化，不能依赖原顺序
+    def sort_key(record):
+        return (order_dict.get(record.name, len(order)), str(record))
     
     # 按照 order 中的顺序对数据进行排序
     sorted_data = sorted(data, key=sort_key)
@@ -561,19 +1633,46 @@ def sort_data(order, data):
 
 # 定义
 urls = read_txt_to_array('scripts/livesource3/urls-daily.txt')
-# 处理
+source_urls = []
 for url in urls:
     if url.startswith("http"):
         if "{MMdd}" in url: #特别处理113
-            current_date_str = datetime.now().strftime("%m%d")
+            current_date_str = current_datetime().strftime("%m%d")
             url=url.replace("{MMdd}", current_date_str)
 
         if "{MMdd-1}" in url: #特别处理113
-            yesterday_date_str = (datetime.now() - timedelta(days=1)).strftime("%m%d")
+            yesterday_date_str = (current_datetime() - timedelta(days=1)).strftime("%m%d")
             url=url.replace("{MMdd-1}", yesterday_date_str)
-            
-        print(f"处理URL: {url}")
-        process_url(url)
+
+        # 主地址|镜像1|镜像2：以主地址作为该订阅源的标识
+        url, *mirrors = [part.strip() for part in url.split('|') if part.strip()]
+        if mirrors:
+            source_mirrors[url] = mirrors
+        source_urls.append(url)
+
+# 处理：下载线程并发下载，主线程按urls-daily.txt中的顺序依次分类（先下载完的源等待前面的源分类完成）
+fetch_start_time = time.time()
+# 已提交的源最多FETCH_QUEUE_SIZE+2个（队列中、正在放入队列、正在分类各一个），每个源都有自己的线程，不会排在其他源后面
+executor = ThreadPoolExecutor(max_workers=FETCH_QUEUE_SIZE + 2)
+fetch_queue = queue.Queue(maxsize=FETCH_QUEUE_SIZE)
+fetch_thread = threading.Thread(target=fetch_stage, args=(executor, source_urls, fetch_queue), daemon=True)
+fetch_thread.start()
+classify_stage(fetch_queue)
+fetch_thread.join()
+# 截止时间后仍在进行的下载不再等待
+executor.shutdown(wait=False, cancel_futures=True)
+request_executor.shutdown(wait=False, cancel_futures=True)
+print(f"订阅源处理完成: {len(source_urls)}个, 耗时: {time.time() - fetch_start_time:.2f}s")
+print_pipeline_stats()
+for url in deadline_cut_sources:
+    print(f"超过截止时间被截断: {url}")
+for url, same_url in duplicate_sources:
+    print(f"内容重复的源: {url} = {same_url}")
+for url, used_url, attempt_count in hedge_results:
+    print(f"镜像对冲: {url} 采用 {used_url} (发起{attempt_count}个请求)")
+print_source_yield_stats()
+if FIXTURE_MODE != 'replay':
+    save_source_stats()
 
 
 
@@ -609,7 +1708,7 @@ for whitelist_line in whitelist_auto_lines:
             print(f"response_time转换失败: {whitelist_line}")
             response_time = 60000  # 单位毫秒，转换失败给个60秒
         if response_time < 2000:  #2s以内的高响应源
-            process_channel_line(",".join(whitelist_parts[1:]))
+            process_channel_line(",".join(whitelist_parts[1:]), 'whitelist_auto.txt', response_time)
 
 
 # def get_http_response(url):
@@ -629,29 +1728,45 @@ def get_http_response(url, timeout=8, retries=2, backoff_factor=1.0):
     }
     for attempt in range(retries):
         try:
-            req = urllib.request.Request(url, headers=headers)
-            with urllib.request.urlopen(req, timeout=timeout) as response:
-                data = response.read()
-                return data.decode('utf-8')
+            if FIXTURE_MODE == 'replay':
+                return read_text_file(replay_fixture(url))
+            remaining = fetch_deadline - time.time()
+            if remaining <= 0:
+                print(f"[Deadline] 超过截止时间，不再请求: {url}")
+                record_deadline_cut(url)
+                snapshot = load_snapshot(url)
+                return read_text_file(snapshot) if snapshot is not None else None
+            return read_text_file(fetch_url_cached(url, headers, timeout=min(timeout, remaining), deadline=fetch_deadline))
+        except SourceRejectedError as e:
+            print(f"[Rejected] {e}, URL: {url}")
+            snapshot = load_snapshot(url)
+            return read_text_file(snapshot) if snapshot is not None else None
         except urllib.error.HTTPError as e:
             print(f"[HTTPError] Code: {e.code}, URL: {url}")
-            break  # 一般来说 HTTP 错误不会在重试中恢复
+            # 一般来说 HTTP 错误不会在重试中恢复，直接尝试快照
+            snapshot = load_snapshot(url)
+            return read_text_file(snapshot) if snapshot is not None else None
         except urllib.error.URLError as e:
             print(f"[URLError] Reason: {e.reason}, Attempt: {attempt + 1}")
         except socket.timeout:
             print(f"[Timeout] URL: {url}, Attempt: {attempt + 1}")
         except Exception as e:
             print(f"[Exception] {type(e).__name__}: {e}, Attempt: {attempt + 1}")
-        
+
+        # 有可用快照时不再重试
+        snapshot = load_snapshot(url)
+        if snapshot is not None:
+            return read_text_file(snapshot)
+
         # 等待一段时间后重试
         if attempt < retries - 1:
             time.sleep(backoff_factor * (2 ** attempt))
-    
+
     return None  # 所有尝试失败后返回 None
 
 # 将日期统一格式化为 MM-DD格式
 def normalize_date_to_md(text):
-    text = text.strip()
+    text = text.lstrip()
 
     # 定义替换函数：确保后面有一个空格
     def format_md(m):
@@ -675,7 +1790,7 @@ def normalize_date_to_md(text):
     return text
 
 # 将日期统一格式化为 MM-DD格式
-normalized_tyss_lines = [normalize_date_to_md(s) for s in tyss_lines]
+normalized_tyss_lines = [record.renamed(normalize_date_to_md(record.name)) for record in tyss_lines]
 
 #AKTV#
 aktv_lines = [] #AKTV
@@ -684,8 +1799,7 @@ aktv_url = "https://aktv.space/live.m3u" #AKTV
 aktv_text = get_http_response(aktv_url)
 if aktv_text:
     print("AKTV成功获取内容")
-    aktv_text = convert_m3u_to_txt(aktv_text)
-    aktv_lines = aktv_text.strip().split('\n')
+    aktv_lines = [f"{entry.name},{entry.url}" for entry in m3u_parser.iter_m3u_entries(aktv_text.split('\n'))]
 else:
     print("AKTV请求失败，从本地获取！")
     aktv_lines = read_txt_to_array('scripts/livesource3/手工区/AKTV.txt')
@@ -746,9 +1860,7 @@ def generate_playlist_html(data_list, output_file='playlist.html'):
 
     html_body = ''
     for idx, entry in enumerate(data_list):
-        if ',' not in entry:
-            continue
-        info, url = entry.split(',', 1)
+        info, url = entry.name, entry.url
         url_id = f"url_{idx}"
         html_body += f'''
         <div class="item">
@@ -799,7 +1911,7 @@ def get_random_url(file_path):
     return random.choice(urls) if urls else None
 
 # 获取当前的 UTC 时间
-utc_time = datetime.now(timezone.utc)
+utc_time = current_datetime(timezone.utc)
 # 北京时间
 beijing_time = utc_time + timedelta(hours=8)
 # 格式化为所需的格式
@@ -825,11 +1937,11 @@ daily_mtv4="🔥贩卖,"+get_random_url('scripts/livesource3/今日推荐.txt')
 
 # 增加手工区 2025-07-20 13:14
 print(f"处理手工区...")
-zj_lines = zj_lines + read_txt_to_array('scripts/livesource3/手工区/浙江频道.txt')
-hb_lines = hb_lines + read_txt_to_array('scripts/livesource3/手工区/湖北频道.txt')
-gd_lines = gd_lines + read_txt_to_array('scripts/livesource3/手工区/广东频道.txt')
-sh_lines = sh_lines + read_txt_to_array('scripts/livesource3/手工区/上海频道.txt')
-jsu_lines = jsu_lines + read_txt_to_array('scripts/livesource3/手工区/江苏频道.txt')
+zj_lines = zj_lines + correct_name_data(corrections_name, read_channel_records('scripts/livesource3/手工区/浙江频道.txt'))
+hb_lines = hb_lines + correct_name_data(corrections_name, read_channel_records('scripts/livesource3/手工区/湖北频道.txt'))
+gd_lines = gd_lines + correct_name_data(corrections_name, read_channel_records('scripts/livesource3/手工区/广东频道.txt'))
+sh_lines = sh_lines + correct_name_data(corrections_name, read_channel_records('scripts/livesource3/手工区/上海频道.txt'))
+jsu_lines = jsu_lines + correct_name_data(corrections_name, read_channel_records('scripts/livesource3/手工区/江苏频道.txt'))
 
 #     ["🚀AKTV📶,#genre#"] + aktv_lines + ['\n'] + \
 
@@ -838,159 +1950,159 @@ jsu_lines = jsu_lines + read_txt_to_array('scripts/livesource3/手工区/江苏
     # ========#
 
 # 全集版 合并所有对象中的行文本（去重，排序后拼接）
-all_lines = ["🌐央视频道,#genre#"] + sort_data(ys_dictionary, correct_name_data(corrections_name, ys_lines)) + ['\n'] + \
-    ["📡卫视频道,#genre#"] + sort_data(ws_dictionary, correct_name_data(corrections_name, ws_lines)) + ['\n'] + \
-    ["☘️湖北频道,#genre#"] + sort_data(hb_dictionary, set(correct_name_data(corrections_name, hb_lines))) + ['\n'] + \
-    ["☘️湖南频道,#genre#"] + sort_data(hn_dictionary, set(correct_name_data(corrections_name, hn_lines))) + ['\n'] + \
-    ["☘️浙江频道,#genre#"] + sort_data(zj_dictionary, set(correct_name_data(corrections_name, zj_lines))) + ['\n'] + \
-    ["☘️广东频道,#genre#"] + sort_data(gd_dictionary, set(correct_name_data(corrections_name, gd_lines))) + ['\n'] + \
-    ["☘️江苏频道,#genre#"] + sort_data(jsu_dictionary, set(correct_name_data(corrections_name, jsu_lines))) + ['\n'] + \
-    ["☘️江西频道,#genre#"] + sort_data(jx_dictionary, set(correct_name_data(corrections_name, jx_lines))) + ['\n'] + \
-    ["☘️北京频道,#genre#"] + sort_data(bj_dictionary, set(correct_name_data(corrections_name, bj_lines))) + ['\n'] + \
-    ["☘️上海频道,#genre#"] + sort_data(sh_dictionary, set(correct_name_data(corrections_name, sh_lines))) + ['\n'] + \
-    ["☘️天津频道,#genre#"] + sort_data(tj_dictionary, set(correct_name_data(corrections_name, tj_lines))) + ['\n'] + \
-    ["☘️重庆频道,#genre#"] + sort_data(cq_dictionary, set(correct_name_data(corrections_name, cq_lines))) + ['\n'] + \
-    ["☘️安徽频道,#genre#"] + sort_data(ah_dictionary, set(correct_name_data(corrections_name, ah_lines))) + ['\n'] + \
-    ["☘️海南频道,#genre#"] + sort_data(hain_dictionary, set(correct_name_data(corrections_name, hain_lines))) + ['\n'] + \
-    ["☘️内蒙频道,#genre#"] + sort_data(nm_dictionary, set(correct_name_data(corrections_name, nm_lines))) + ['\n'] + \
-    ["☘️辽宁频道,#genre#"] + sort_data(ln_dictionary, set(correct_name_data(corrections_name, ln_lines))) + ['\n'] + \
-    ["☘️陕西频道,#genre#"] + sort_data(sx_dictionary, set(correct_name_data(corrections_name, sx_lines))) + ['\n'] + \
-    ["☘️山东频道,#genre#"] + sort_data(shandong_dictionary, set(correct_name_data(corrections_name, shandong_lines))) + ['\n'] + \
-    ["☘️山西频道,#genre#"] + sort_data(shanxi_dictionary, set(correct_name_data(corrections_name, shanxi_lines))) + ['\n'] + \
-    ["☘️云南频道,#genre#"] + sort_data(yunnan_dictionary, set(correct_name_data(corrections_name, yunnan_lines))) + ['\n'] + \
-    ["☘️福建频道,#genre#"] + sort_data(fj_dictionary, set(correct_name_data(corrections_name, fj_lines))) + ['\n'] + \
-    ["☘️甘肃频道,#genre#"] + sort_data(gs_dictionary, set(correct_name_data(corrections_name, gs_lines))) + ['\n'] + \
-    ["☘️广西频道,#genre#"] + sort_data(gx_dictionary, set(correct_name_data(corrections_name, gx_lines))) + ['\n'] + \
-    ["☘️贵州频道,#genre#"] + sort_data(gz_dictionary, set(correct_name_data(corrections_name, gz_lines))) + ['\n'] + \
-    ["☘️河北频道,#genre#"] + sort_data(heb_dictionary, set(correct_name_data(corrections_name, heb_lines))) + ['\n'] + \
-    ["☘️河南频道,#genre#"] + sort_data(hen_dictionary, set(correct_name_data(corrections_name, hen_lines))) + ['\n'] + \
-    ["☘️吉林频道,#genre#"] + sort_data(jl_dictionary, set(correct_name_data(corrections_name, jl_lines))) + ['\n'] + \
-    ["☘️宁夏频道,#genre#"] + sort_data(nx_dictionary, set(correct_name_data(corrections_name, nx_lines))) + ['\n'] + \
-    ["☘️青海频道,#genre#"] + sort_data(qh_dictionary, set(correct_name_data(corrections_name, qh_lines))) + ['\n'] + \
-    ["☘️四川频道,#genre#"] + sort_data(sc_dictionary, set(correct_name_data(corrections_name, sc_lines))) + ['\n'] + \
-    ["☘️新疆频道,#genre#"] + sort_data(xj_dictionary, set(correct_name_data(corrections_name, xj_lines))) + ['\n'] + \
-    ["☘️黑龙江台,#genre#"] + sorted(set(correct_name_data(corrections_name, hlj_lines))) + ['\n'] + \
-    ["🎞️数字频道,#genre#"] + sort_data(sz_dictionary, set(correct_name_data(corrections_name, sz_lines))) + ['\n'] + \
-    ["🌎国际频道,#genre#"] + sort_data(gj_dictionary, set(correct_name_data(corrections_name, gj_lines))) + ['\n'] + \
-    ["⚽体育频道,#genre#"] + sort_data(ty_dictionary, set(correct_name_data(corrections_name, ty_lines))) + ['\n'] + \
+all_lines = ["🌐央视频道,#genre#"] + sort_data(ys_dictionary, ys_lines) + ['\n'] + \
+    ["📡卫视频道,#genre#"] + sort_data(ws_dictionary, ws_lines) + ['\n'] + \
+    ["☘️湖北频道,#genre#"] + sort_data(hb_dictionary, set(hb_lines)) + ['\n'] + \
+    ["☘️湖南频道,#genre#"] + sort_data(hn_dictionary, set(hn_lines)) + ['\n'] + \
+    ["☘️浙江频道,#genre#"] + sort_data(zj_dictionary, set(zj_lines)) + ['\n'] + \
+    ["☘️广东频道,#genre#"] + sort_data(gd_dictionary, set(gd_lines)) + ['\n'] + \
+    ["☘️江苏频道,#genre#"] + sort_data(jsu_dictionary, set(jsu_lines)) + ['\n'] + \
+    ["☘️江西频道,#genre#"] + sort_data(jx_dictionary, set(jx_lines)) + ['\n'] + \
+    ["☘️北京频道,#genre#"] + sort_data(bj_dictionary, set(bj_lines)) + ['\n'] + \
+    ["☘️上海频道,#genre#"] + sort_data(sh_dictionary, set(sh_lines)) + ['\n'] + \
+    ["☘️天津频道,#genre#"] + sort_data(tj_dictionary, set(tj_lines)) + ['\n'] + \
+    ["☘️重庆频道,#genre#"] + sort_data(cq_dictionary, set(cq_lines)) + ['\n'] + \
+    ["☘️安徽频道,#genre#"] + sort_data(ah_dictionary, set(ah_lines)) + ['\n'] + \
+    ["☘️海南频道,#genre#"] + sort_data(hain_dictionary, set(hain_lines)) + ['\n'] + \
+    ["☘️内蒙频道,#genre#"] + sort_data(nm_dictionary, set(nm_lines)) + ['\n'] + \
+    ["☘️辽宁频道,#genre#"] + sort_data(ln_dictionary, set(ln_lines)) + ['\n'] + \
+    ["☘️陕西频道,#genre#"] + sort_data(sx_dictionary, set(sx_lines)) + ['\n'] + \
+    ["☘️山东频道,#genre#"] + sort_data(shandong_dictionary, set(shandong_lines)) + ['\n'] + \
+    ["☘️山西频道,#genre#"] + sort_data(shanxi_dictionary, set(shanxi_lines)) + ['\n'] + \
+    ["☘️云南频道,#genre#"] + sort_data(yunnan_dictionary, set(yunnan_lines)) + ['\n'] + \
+    ["☘️福建频道,#genre#"] + sort_data(fj_dictionary, set(fj_lines)) + ['\n'] + \
+    ["☘️甘肃频道,#genre#"] + sort_data(gs_dictionary, set(gs_lines)) + ['\n'] + \
+    ["☘️广西频道,#genre#"] + sort_data(gx_dictionary, set(gx_lines)) + ['\n'] + \
+    ["☘️贵州频道,#genre#"] + sort_data(gz_dictionary, set(gz_lines)) + ['\n'] + \
+    ["☘️河北频道,#genre#"] + sort_data(heb_dictionary, set(heb_lines)) + ['\n'] + \
+    ["☘️河南频道,#genre#"] + sort_data(hen_dictionary, set(hen_lines)) + ['\n'] + \
+    ["☘️吉林频道,#genre#"] + sort_data(jl_dictionary, set(jl_lines)) + ['\n'] + \
+    ["☘️宁夏频道,#genre#"] + sort_data(nx_dictionary, set(nx_lines)) + ['\n'] + \
+    ["☘️青海频道,#genre#"] + sort_data(qh_dictionary, set(qh_lines)) + ['\n'] + \
+    ["☘️四川频道,#genre#"] + sort_data(sc_dictionary, set(sc_lines)) + ['\n'] + \
+    ["☘️新疆频道,#genre#"] + sort_data(xj_dictionary, set(xj_lines)) + ['\n'] + \
+    ["☘️黑龙江台,#genre#"] + sorted(set(hlj_lines)) + ['\n'] + \
+    ["🎞️数字频道,#genre#"] + sort_data(sz_dictionary, set(sz_lines)) + ['\n'] + \
+    ["🌎国际频道,#genre#"] + sort_data(gj_dictionary, set(gj_lines)) + ['\n'] + \
+    ["⚽体育频道,#genre#"] + sort_data(ty_dictionary, set(ty_lines)) + ['\n'] + \
     ["🏆体育赛事,#genre#"] + normalized_tyss_lines + ['\n'] + \
-    ["🐬斗鱼直播,#genre#"] + sort_data(douyu_dictionary, set(correct_name_data(corrections_name, douyu_lines))) + ['\n'] + \
-    ["🐯虎牙直播,#genre#"] + sort_data(huya_dictionary, set(correct_name_data(corrections_name, huya_lines))) + ['\n'] + \
-    ["🎙️解说频道,#genre#"] + sort_data(js_dictionary, set(correct_name_data(corrections_name, js_lines))) + ['\n'] + \
-    ["🎬电影频道,#genre#"] + sort_data(dy_dictionary, set(correct_name_data(corrections_name, dy_lines))) + ['\n'] + \
-    ["📺电·视·剧,#genre#"] + sort_data(dsj_dictionary, set(correct_name_data(corrections_name, dsj_lines))) + ['\n'] + \
-    ["📽️记·录·片,#genre#"] + sort_data(jlp_dictionary,set(correct_name_data(corrections_name,jlp_lines)))+ ['\n'] + \
-    ["🏕动·画·片,#genre#"] + sort_data(dhp_dictionary, set(correct_name_data(corrections_name, dhp_lines))) + ['\n'] + \
-    ["📻收·音·机,#genre#"] + sort_data(radio_dictionary, set(correct_name_data(corrections_name, radio_lines))) + ['\n'] + \
-    ["🇨🇳港·澳·台,#genre#"] +read_txt_to_array('scripts/livesource3/手工区/♪港澳台.txt') + sort_data(gat_dictionary, set(correct_name_data(corrections_name, gat_lines))) + aktv_lines + ['\n'] + \
-    ["🇭🇰香港频道,#genre#"] + sort_data(xg_dictionary, set(correct_name_data(corrections_name, xg_lines))) + ['\n'] + \
-    ["🇲🇴澳门频道,#genre#"] + sort_data(aomen_dictionary, set(correct_name_data(corrections_name, aomen_lines))) + aktv_lines + ['\n'] + \
-    ["🇹🇼台湾频道,#genre#"] + sort_data(tw_dictionary, set(correct_name_data(corrections_name, tw_lines)))  + ['\n'] + \
-    ["🎭戏曲频道,#genre#"] + sort_data(xq_dictionary,set(correct_name_data(corrections_name,xq_lines))) + ['\n'] + \
-    ["🎵音乐频道,#genre#"] + sort_data(yy_dictionary, set(correct_name_data(corrections_name, yy_lines))) + ['\n'] + \
-    ["🎤综艺频道,#genre#"] + sorted(set(correct_name_data(corrections_name,zy_lines))) + ['\n'] + \
-    ["🎮游戏频道,#genre#"] + sorted(set(correct_name_data(corrections_name,game_lines))) + ['\n'] + \
+    ["🐬斗鱼直播,#genre#"] + sort_data(douyu_dictionary, set(douyu_lines)) + ['\n'] + \
+    ["🐯虎牙直播,#genre#"] + sort_data(huya_dictionary, set(huya_lines)) + ['\n'] + \
+    ["🎙️解说频道,#genre#"] + sort_data(js_dictionary, set(js_lines)) + ['\n'] + \
+    ["🎬电影频道,#genre#"] + sort_data(dy_dictionary, set(dy_lines)) + ['\n'] + \
+    ["📺电·视·剧,#genre#"] + sort_data(dsj_dictionary, set(dsj_lines)) + ['\n'] + \
+    ["📽️记·录·片,#genre#"] + sort_data(jlp_dictionary,set(jlp_lines))+ ['\n'] + \
+    ["🏕动·画·片,#genre#"] + sort_data(dhp_dictionary, set(dhp_lines)) + ['\n'] + \
+    ["📻收·音·机,#genre#"] + sort_data(radio_dictionary, set(radio_lines)) + ['\n'] + \
+    ["🇨🇳港·澳·台,#genre#"] +read_txt_to_array('scripts/livesource3/手工区/♪港澳台.txt') + sort_data(gat_dictionary, set(gat_lines)) + aktv_lines + ['\n'] + \
+    ["🇭🇰香港频道,#genre#"] + sort_data(xg_dictionary, set(xg_lines)) + ['\n'] + \
+    ["🇲🇴澳门频道,#genre#"] + sort_data(aomen_dictionary, set(aomen_lines)) + aktv_lines + ['\n'] + \
+    ["🇹🇼台湾频道,#genre#"] + sort_data(tw_dictionary, set(tw_lines))  + ['\n'] + \
+    ["🎭戏曲频道,#genre#"] + sort_data(xq_dictionary,set(xq_lines)) + ['\n'] + \
+    ["🎵音乐频道,#genre#"] + sort_data(yy_dictionary, set(yy_lines)) + ['\n'] + \
+    ["🎤综艺频道,#genre#"] + sorted(set(zy_lines)) + ['\n'] + \
+    ["🎮游戏频道,#genre#"] + sorted(set(game_lines)) + ['\n'] + \
     ["✨优质央视,#genre#"] + read_txt_to_array('scripts/livesource3/手工区/♪优质央视.txt') + ['\n'] + \
     ["🛰️优质卫视,#genre#"] + read_txt_to_array('scripts/livesource3/手工区/♪优质卫视.txt') + ['\n'] + \
-    ["📹直播中国,#genre#"] + sort_data(zb_dictionary, set(correct_name_data(corrections_name, zb_lines))) + ['\n'] + \
-    ["🧨历届春晚,#genre#"] + sort_data(cw_dictionary, set(correct_name_data(corrections_name, cw_lines))) + ['\n'] + \
+    ["📹直播中国,#genre#"] + sort_data(zb_dictionary, set(zb_lines)) + ['\n'] + \
+    ["🧨历届春晚,#genre#"] + sort_data(cw_dictionary, set(cw_lines)) + ['\n'] + \
     ["🕒更新时间,#genre#"] + [version] + [about] + [daily_mtv] + [daily_mtv1] + [daily_mtv2] + [daily_mtv3] + [daily_mtv4] + read_txt_to_array('scripts/livesource3/手工区/about.txt') + ['\n']
 
 # 精简版
-all_lines_lite = ["央视频道,#genre#"] + sort_data(ys_dictionary, correct_name_data(corrections_name, ys_lines)) + ['\n'] + \
-    ["卫视频道,#genre#"] + sort_data(ws_dictionary, correct_name_data(corrections_name, ws_lines)) + ['\n'] + \
+all_lines_lite = ["央视频道,#genre#"] + sort_data(ys_dictionary, ys_lines) + ['\n'] + \
+    ["卫视频道,#genre#"] + sort_data(ws_dictionary, ws_lines) + ['\n'] + \
     ["地方频道,#genre#"] + \
-    sort_data(hb_dictionary, set(correct_name_data(corrections_name, hb_lines))) + \
-    sort_data(hn_dictionary, set(correct_name_data(corrections_name, hn_lines))) + \
-    sort_data(zj_dictionary, set(correct_name_data(corrections_name, zj_lines))) + \
-    sort_data(gd_dictionary, set(correct_name_data(corrections_name, gd_lines))) + \
-    sort_data(shandong_dictionary, set(correct_name_data(corrections_name, shandong_lines))) + \
-    sorted(set(correct_name_data(corrections_name, jsu_lines))) + \
-    sorted(set(correct_name_data(corrections_name, ah_lines))) + \
-    sorted(set(correct_name_data(corrections_name, hain_lines))) + \
-    sorted(set(correct_name_data(corrections_name, nm_lines))) + \
-    sorted(set(correct_name_data(corrections_name, ln_lines))) + \
-    sorted(set(correct_name_data(corrections_name, sx_lines))) + \
-    sorted(set(correct_name_data(corrections_name, shanxi_lines))) + \
-    sorted(set(correct_name_data(corrections_name, yunnan_lines))) + \
-    sorted(set(correct_name_data(corrections_name, bj_lines))) + \
-    sorted(set(correct_name_data(corrections_name, cq_lines))) + \
-    sorted(set(correct_name_data(corrections_name, fj_lines))) + \
-    sorted(set(correct_name_data(corrections_name, gs_lines))) + \
-    sorted(set(correct_name_data(corrections_name, gx_lines))) + \
-    sorted(set(correct_name_data(corrections_name, gz_lines))) + \
-    sorted(set(correct_name_data(corrections_name, heb_lines))) + \
-    sorted(set(correct_name_data(corrections_name, hen_lines))) + \
-    sorted(set(correct_name_data(corrections_name, jl_lines))) + \
-    sorted(set(correct_name_data(corrections_name, jx_lines))) + \
-    sorted(set(correct_name_data(corrections_name, nx_lines))) + \
-    sorted(set(correct_name_data(corrections_name, qh_lines))) + \
-    sorted(set(correct_name_data(corrections_name, sc_lines))) + \
-    sorted(set(correct_name_data(corrections_name, tj_lines))) + \
-    sorted(set(correct_name_data(corrections_name, xj_lines))) + \
-    sorted(set(correct_name_data(corrections_name, hlj_lines))) + \
+    sort_data(hb_dictionary, set(hb_lines)) + \
+    sort_data(hn_dictionary, set(hn_lines)) + \
+    sort_data(zj_dictionary, set(zj_lines)) + \
+    sort_data(gd_dictionary, set(gd_lines)) + \
+    sort_data(shandong_dictionary, set(shandong_lines)) + \
+    sorted(set(jsu_lines)) + \
+    sorted(set(ah_lines)) + \
+    sorted(set(hain_lines)) + \
+    sorted(set(nm_lines)) + \
+    sorted(set(ln_lines)) + \
+    sorted(set(sx_lines)) + \
+    sorted(set(shanxi_lines)) + \
+    sorted(set(yunnan_lines)) + \
+    sorted(set(bj_lines)) + \
+    sorted(set(cq_lines)) + \
+    sorted(set(fj_lines)) + \
+    sorted(set(gs_lines)) + \
+    sorted(set(gx_lines)) + \
+    sorted(set(gz_lines)) + \
+    sorted(set(heb_lines)) + \
+    sorted(set(hen_lines)) + \
+    sorted(set(jl_lines)) + \
+    sorted(set(jx_lines)) + \
+    sorted(set(nx_lines)) + \
+    sorted(set(qh_lines)) + \
+    sorted(set(sc_lines)) + \
+    sorted(set(tj_lines)) + \
+    sorted(set(xj_lines)) + \
+    sorted(set(hlj_lines)) + \
     ['\n'] + \
-    ["数字频道,#genre#"] + sort_data(sz_dictionary, set(correct_name_data(corrections_name, sz_lines))) + ['\n'] + \
+    ["数字频道,#genre#"] + sort_data(sz_dictionary, set(sz_lines)) + ['\n'] + \
     ["更新时间,#genre#"] + [version] + ['\n']
 
 # 定制版
-all_lines_custom = ["🌐央视频道,#genre#"] + sort_data(ys_dictionary, correct_name_data(corrections_name, ys_lines)) + ['\n'] + \
-    ["📡卫视频道,#genre#"] + sort_data(ws_dictionary, correct_name_data(corrections_name, ws_lines)) + ['\n'] + \
+all_lines_custom = ["🌐央视频道,#genre#"] + sort_data(ys_dictionary, ys_lines) + ['\n'] + \
+    ["📡卫视频道,#genre#"] + sort_data(ws_dictionary, ws_lines) + ['\n'] + \
     ["🏠地方频道,#genre#"] + \
-    sort_data(hb_dictionary, set(correct_name_data(corrections_name, hb_lines))) + \
-    sort_data(hn_dictionary, set(correct_name_data(corrections_name, hn_lines))) + \
-    sort_data(zj_dictionary, set(correct_name_data(corrections_name, zj_lines))) + \
-    sort_data(gd_dictionary, set(correct_name_data(corrections_name, gd_lines))) + \
-    sort_data(shandong_dictionary, set(correct_name_data(corrections_name, shandong_lines))) + \
-    sorted(set(correct_name_data(corrections_name, jsu_lines))) + \
-    sorted(set(correct_name_data(corrections_name, ah_lines))) + \
-    sorted(set(correct_name_data(corrections_name, hain_lines))) + \
-    sorted(set(correct_name_data(corrections_name, nm_lines))) + \
-    sorted(set(correct_name_data(corrections_name, ln_lines))) + \
-    sorted(set(correct_name_data(corrections_name, sx_lines))) + \
-    sorted(set(correct_name_data(corrections_name, shanxi_lines))) + \
-    sorted(set(correct_name_data(corrections_name, yunnan_lines))) + \
-    sorted(set(correct_name_data(corrections_name, bj_lines))) + \
-    sorted(set(correct_name_data(corrections_name, cq_lines))) + \
-    sorted(set(correct_name_data(corrections_name, fj_lines))) + \
-    sorted(set(correct_name_data(corrections_name, gs_lines))) + \
-    sorted(set(correct_name_data(corrections_name, gx_lines))) + \
-    sorted(set(correct_name_data(corrections_name, gz_lines))) + \
-    sorted(set(correct_name_data(corrections_name, heb_lines))) + \
-    sorted(set(correct_name_data(corrections_name, hen_lines))) + \
-    sorted(set(correct_name_data(corrections_name, jl_lines))) + \
-    sorted(set(correct_name_data(corrections_name, jx_lines))) + \
-    sorted(set(correct_name_data(corrections_name, nx_lines))) + \
-    sorted(set(correct_name_data(corrections_name, qh_lines))) + \
-    sorted(set(correct_name_data(corrections_name, sc_lines))) + \
-    sorted(set(correct_name_data(corrections_name, tj_lines))) + \
-    sorted(set(correct_name_data(corrections_name, xj_lines))) + \
-    sorted(set(correct_name_data(corrections_name, hlj_lines))) + \
+    sort_data(hb_dictionary, set(hb_lines)) + \
+    sort_data(hn_dictionary, set(hn_lines)) + \
+    sort_data(zj_dictionary, set(zj_lines)) + \
+    sort_data(gd_dictionary, set(gd_lines)) + \
+    sort_data(shandong_dictionary, set(shandong_lines)) + \
+    sorted(set(jsu_lines)) + \
+    sorted(set(ah_lines)) + \
+    sorted(set(hain_lines)) + \
+    sorted(set(nm_lines)) + \
+    sorted(set(ln_lines)) + \
+    sorted(set(sx_lines)) + \
+    sorted(set(shanxi_lines)) + \
+    sorted(set(yunnan_lines)) + \
+    sorted(set(bj_lines)) + \
+    sorted(set(cq_lines)) + \
+    sorted(set(fj_lines)) + \
+    sorted(set(gs_lines)) + \
+    sorted(set(gx_lines)) + \
+    sorted(set(gz_lines)) + \
+    sorted(set(heb_lines)) + \
+    sorted(set(hen_lines)) + \
+    sorted(set(jl_lines)) + \
+    sorted(set(jx_lines)) + \
+    sorted(set(nx_lines)) + \
+    sorted(set(qh_lines)) + \
+    sorted(set(sc_lines)) + \
+    sorted(set(tj_lines)) + \
+    sorted(set(xj_lines)) + \
+    sorted(set(hlj_lines)) + \
     ['\n'] + \
-    ["🎞️数字频道,#genre#"] + sort_data(sz_dictionary, set(correct_name_data(corrections_name, sz_lines))) + ['\n'] + \
-    ["🌎国际频道,#genre#"] + sort_data(gj_dictionary, set(correct_name_data(corrections_name, gj_lines))) + ['\n'] + \
-    ["⚽体育频道,#genre#"] + sort_data(ty_dictionary, set(correct_name_data(corrections_name, ty_lines))) + ['\n'] + \
+    ["🎞️数字频道,#genre#"] + sort_data(sz_dictionary, set(sz_lines)) + ['\n'] + \
+    ["🌎国际频道,#genre#"] + sort_data(gj_dictionary, set(gj_lines)) + ['\n'] + \
+    ["⚽体育频道,#genre#"] + sort_data(ty_dictionary, set(ty_lines)) + ['\n'] + \
     ["🏆体育赛事,#genre#"] + normalized_tyss_lines + ['\n'] + \
-    ["🐬斗鱼直播,#genre#"] + sort_data(douyu_dictionary, set(correct_name_data(corrections_name, douyu_lines))) + ['\n'] + \
-    ["🐯虎牙直播,#genre#"] + sort_data(huya_dictionary, set(correct_name_data(corrections_name, huya_lines))) + ['\n'] + \
-    ["🎙️解说频道,#genre#"] + sort_data(js_dictionary, set(correct_name_data(corrections_name, js_lines))) + ['\n'] + \
-    ["🎬电影频道,#genre#"] + sort_data(dy_dictionary, set(correct_name_data(corrections_name, dy_lines))) + ['\n'] + \
-    ["📺电·视·剧,#genre#"] + sort_data(dsj_dictionary, set(correct_name_data(corrections_name, dsj_lines))) + ['\n'] + \
-    ["📽️记·录·片,#genre#"] + sort_data(jlp_dictionary,set(correct_name_data(corrections_name,jlp_lines)))+ ['\n'] + \
-    ["🏕动·画·片,#genre#"] + sort_data(dhp_dictionary, set(correct_name_data(corrections_name, dhp_lines))) + ['\n'] + \
-    ["📻收·音·机,#genre#"] + sort_data(radio_dictionary, set(correct_name_data(corrections_name, radio_lines))) + ['\n'] + \
-    ["🇨🇳港·澳·台,#genre#"] +read_txt_to_array('scripts/livesource3/手工区/♪港澳台.txt') + sort_data(gat_dictionary, set(correct_name_data(corrections_name, gat_lines))) + aktv_lines + ['\n'] + \
-    ["🇭🇰香港频道,#genre#"] + sort_data(xg_dictionary, set(correct_name_data(corrections_name, xg_lines))) + ['\n'] + \
-    ["🇲🇴澳门频道,#genre#"] + sort_data(aomen_dictionary, set(correct_name_data(corrections_name, aomen_lines))) + aktv_lines + ['\n'] + \
-    ["🇹🇼台湾频道,#genre#"] + sort_data(tw_dictionary, set(correct_name_data(corrections_name, tw_lines)))  + ['\n'] + \
-    ["🎭戏曲频道,#genre#"] + sort_data(xq_dictionary,set(correct_name_data(corrections_name,xq_lines))) + ['\n'] + \
-    ["🎵音乐频道,#genre#"] + sort_data(yy_dictionary, set(correct_name_data(corrections_name, yy_lines))) + ['\n'] + \
-    ["🎤综艺频道,#genre#"] + sorted(set(correct_name_data(corrections_name,zy_lines))) + ['\n'] + \
-    ["🎮游戏频道,#genre#"] + sorted(set(correct_name_data(corrections_name,game_lines))) + ['\n'] + \
+    ["🐬斗鱼直播,#genre#"] + sort_data(douyu_dictionary, set(douyu_lines)) + ['\n'] + \
+    ["🐯虎牙直播,#genre#"] + sort_data(huya_dictionary, set(huya_lines)) + ['\n'] + \
+    ["🎙️解说频道,#genre#"] + sort_data(js_dictionary, set(js_lines)) + ['\n'] + \
+    ["🎬电影频道,#genre#"] + sort_data(dy_dictionary, set(dy_lines)) + ['\n'] + \
+    ["📺电·视·剧,#genre#"] + sort_data(dsj_dictionary, set(dsj_lines)) + ['\n'] + \
+    ["📽️记·录·片,#genre#"] + sort_data(jlp_dictionary,set(jlp_lines))+ ['\n'] + \
+    ["🏕动·画·片,#genre#"] + sort_data(dhp_dictionary, set(dhp_lines)) + ['\n'] + \
+    ["📻收·音·机,#genre#"] + sort_data(radio_dictionary, set(radio_lines)) + ['\n'] + \
+    ["🇨🇳港·澳·台,#genre#"] +read_txt_to_array('scripts/livesource3/手工区/♪港澳台.txt') + sort_data(gat_dictionary, set(gat_lines)) + aktv_lines + ['\n'] + \
+    ["🇭🇰香港频道,#genre#"] + sort_data(xg_dictionary, set(xg_lines)) + ['\n'] + \
+    ["🇲🇴澳门频道,#genre#"] + sort_data(aomen_dictionary, set(aomen_lines)) + aktv_lines + ['\n'] + \
+    ["🇹🇼台湾频道,#genre#"] + sort_data(tw_dictionary, set(tw_lines))  + ['\n'] + \
+    ["🎭戏曲频道,#genre#"] + sort_data(xq_dictionary,set(xq_lines)) + ['\n'] + \
+    ["🎵音乐频道,#genre#"] + sort_data(yy_dictionary, set(yy_lines)) + ['\n'] + \
+    ["🎤综艺频道,#genre#"] + sorted(set(zy_lines)) + ['\n'] + \
+    ["🎮游戏频道,#genre#"] + sorted(set(game_lines)) + ['\n'] + \
     ["✨优质央视,#genre#"] + read_txt_to_array('scripts/livesource3/手工区/♪优质央视.txt') + ['\n'] + \
     ["🛰️优质卫视,#genre#"] + read_txt_to_array('scripts/livesource3/手工区/♪优质卫视.txt') + ['\n'] + \
-    ["📹直播中国,#genre#"] + sort_data(zb_dictionary, set(correct_name_data(corrections_name, zb_lines))) + ['\n'] + \
-    ["🧨历届春晚,#genre#"] + sort_data(cw_dictionary, set(correct_name_data(corrections_name, cw_lines))) + ['\n'] + \
+    ["📹直播中国,#genre#"] + sort_data(zb_dictionary, set(zb_lines)) + ['\n'] + \
+    ["🧨历届春晚,#genre#"] + sort_data(cw_dictionary, set(cw_lines)) + ['\n'] + \
     ["🕒更新时间,#genre#"] + [version] + [about] + [daily_mtv] + [daily_mtv1] + [daily_mtv2] + [daily_mtv3] + [daily_mtv4] + read_txt_to_array('scripts/livesource3/手工区/about.txt') + ['\n']
 
     # =========#
@@ -1020,25 +2132,25 @@ try:
     # 写入精简版
     with open(new_output_file_lite, 'w', encoding='utf-8') as f:
         for line in all_lines_lite:
-            f.write(line + '\n')
+            f.write(f"{line}\n")
     print(f"精简版已保存: {new_output_file_lite}")
 
     # 写入全集版
     with open(new_output_file, 'w', encoding='utf-8') as f:
         for line in all_lines:
-            f.write(line + '\n')
+            f.write(f"{line}\n")
     print(f"全集版已保存: {new_output_file}")
 
     # 写入其他源
     with open(others_file, 'w', encoding='utf-8') as f:
         for line in other_lines:
-            f.write(line + '\n')
+            f.write(f"{line}\n")
     print(f"其他源已保存: {others_file}")
 
     # 写入定制
     with open(new_output_file_custom, 'w', encoding='utf-8') as f:
         for line in all_lines_custom:
-            f.write(line + '\n')
+            f.write(f"{line}\n")
     print(f"定制版已保存: {new_output_file_custom}")
 
 except Exception as e:
@@ -1090,7 +2202,8 @@ def get_logo_by_channel_name(channel_name):
 # print("merged_output.m3u文件已生成。")
 
 
-def make_m3u(txt_file, m3u_file):
+# 由生成txt用的行（频道记录和文本行）生成m3u，不再重新读取txt文件逐行split
+def make_m3u(lines, m3u_file):
     try:
         #output_text = '#EXTM3U x-tvg-url="https://live.fanmingming.com/e.xml,https://epg.112114.xyz/pp.xml.gz,https://assets.livednow.com/epg.xml"\n'
         output_text = '#EXTM3U x-tvg-url="https://live.fanmingming.cn/e.xml"\n'
@@ -1109,18 +2222,24 @@ def make_m3u(txt_file, m3u_file):
         #         line = line.strip()
         #         if line:  # 忽略空行
         #             m3u.write(f'{line}\n')
-        with open(txt_file, "r", encoding='utf-8') as file:
-            input_text = file.read()
-
-        lines = input_text.strip().split("\n")
         group_name = ""
         for line in lines:
-            parts = line.split(",")
-            if len(parts) == 2 and "#genre#" in line:
-                group_name = parts[0]
-            elif len(parts) == 2:
-                channel_name = parts[0]
-                channel_url = parts[1]
+            if isinstance(line, ChannelRecord):
+                if ',' in line.name or ',' in line.url:
+                    continue  # 与下面的文本行一样（len(parts) == 2），名称或URL中有逗号的不写入
+                if "#genre#" in line.url:
+                    group_name = line.name
+                    continue
+                channels = [(line.name, line.url)]
+            else:
+                channels = []
+                for text_line in line.split("\n"):
+                    parts = text_line.split(",")
+                    if len(parts) == 2 and "#genre#" in text_line:
+                        group_name = parts[0]
+                    elif len(parts) == 2:
+                        channels.append((parts[0], parts[1]))
+            for channel_name, channel_url in channels:
                 logo_url=get_logo_by_channel_name(channel_name)
                 if logo_url is None:  #not found logo
                     output_text += f"#EXTINF:-1 group-title=\"{group_name}\",{channel_name}\n"
@@ -1139,9 +2258,9 @@ def make_m3u(txt_file, m3u_file):
     except Exception as e:
         print(f"发生错误: {e}")
 
-make_m3u(new_output_file, new_output_file.replace(".txt", ".m3u"))
-make_m3u(new_output_file_lite, new_output_file_lite.replace(".txt", ".m3u"))
-make_m3u(new_output_file_custom, new_output_file_custom.replace(".txt", ".m3u"))
+make_m3u(all_lines, new_output_file.replace(".txt", ".m3u"))
+make_m3u(all_lines_lite, new_output_file_lite.replace(".txt", ".m3u"))
+make_m3u(all_lines_custom, new_output_file_custom.replace(".txt", ".m3u"))
 
 # 执行结束时间
 timeend = datetime.now()
@@ -1169,6 +2288,13 @@ print(f"黑名单行数: {combined_blacklist_hj} ")
 print(f"全集版行数: {all_lines_hj} ")
 print(f"其它源行数: {other_lines_hj} ")
 print(f"定制版行数: {all_lines_custom_hj} ")
+print_http_cache_stats()
+print(f"名称缓存: 命中 {name_cache_stats['hit']}, 新处理 {name_cache_stats['miss']}, 保存 {len(used_names)} 个名称")
+save_name_cache()
+print(net_tools.connection_reuse_summary())
+net_tools.close_all_connections()
+if FIXTURE_MODE == 'record':
+    save_fixture_archive(FIXTURE_ARCHIVE)
 
 #备用1：http://tonkiang.us
 #备用2：https://www.zoomeye.hk,https://www.shodan.io,https://tv.cctv.com/live/
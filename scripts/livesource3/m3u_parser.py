@@ -0,0 +1,96 @@
+# m3u播放列表解析（livesource3.py 与 blacklist/blacklist.py 共用）
+# 一次遍历逐行产出频道记录；#EXTINF中的tvg-id、tvg-name、tvg-logo、group-title随记录保留，用到时才解析
+
+import collections
+import re
+
+EXTINF_ATTR_PATTERN = re.compile(r'([A-Za-z0-9_-]+)="([^"]*)"')
+URL_PREFIXES = ("http", "rtmp", "p3p")
+
+# 解析#EXTINF行名称之前部分的属性，返回 {属性名(小写): 值}
+def parse_extinf_attributes(extinf):
+    if '="' not in extinf:
+        return {}
+    head = extinf[:find_name_separator(extinf)] if ',' in extinf else extinf
+    return {name.lower(): value for name, value in EXTINF_ATTR_PATTERN.findall(head)}
+
+# 播放列表中的一个频道：名称、URL及对应的#EXTINF行（txt格式的行为空字符串）
+class M3UEntry(collections.namedtuple('M3UEntry', ['name', 'url', 'extinf'])):
+    __slots__ = ()
+
+    @property
+    def attributes(self):
+        return parse_extinf_attributes(self.extinf)
+
+    @property
+    def tvg_id(self):
+        return self.attributes.get('tvg-id', '')
+
+    @property
+    def tvg_name(self):
+        return self.attributes.get('tvg-name', '')
+
+    @property
+    def tvg_logo(self):
+        return self.attributes.get('tvg-logo', '')
+
+    @property
+    def group_title(self):
+        return self.attributes.get('group-title', '')
+
+# 找到#EXTINF行中名称前的逗号（跳过引号内的逗号，如 tvg-name="A,B"），没有时返回-1
+def find_name_separator(line):
+    comma = line.find(',')
+    while comma != -1 and line.count('"', 0, comma) % 2:
+        comma = line.find(',', comma + 1)
+    return comma
+
+# 取#EXTINF行中的频道名称（名称中可以有逗号），没有逗号时与原来一样取整行
+def parse_extinf_name(line):
+    separator = find_name_separator(line)
+    if separator == -1:
+        return line.strip()
+    return line[separator + 1:].strip()
+
+# 名称中的逗号换成空格（连续的空白合并为一个）：频道都输出为"名称,URL"行，之后生成m3u、blacklist检测等都按逗号拆分
+def normalize_entry_name(name):
+    if ',' not in name:
+        return name
+    return ' '.join(name.replace(',', ' ').split())
+
+# 判断是否为"频道名称,URL"格式的行（后缀是m3u但内容是txt的文件）
+# 等价于 re.match(r'^[^,]+,[^\s]+://[^\s]+$', line)，不用逐行正则；返回 (名称, URL) 或 None
+def split_txt_line(line):
+    separator = line.find(',')
+    if separator <= 0:
+        return None
+    url = line[separator + 1:]
+    if '://' not in url[1:-1]:
+        return None
+    parts = url.split(None, 1)  # URL部分不能有空白字符
+    if len(parts) != 1 or parts[0] != url:
+        return None
+    return line[:separator], url
+
+# 逐行解析m3u内容（lines为不带换行符的行），产出M3UEntry，名称已经过normalize_entry_name
+# include_txt_lines为False时不产出m3u中夹带的"频道名称,URL"行（只取#EXTINF与URL行）
+def iter_m3u_entries(lines, include_txt_lines=True):
+    channel_name = ""
+    extinf = ""
+    for line in lines:
+        # 过滤掉 #EXTM3U 开头的行
+        if line.startswith("#EXTM3U"):
+            continue
+        # #EXTINF行：记下频道名称，供下一个URL行使用
+        if line.startswith("#EXTINF"):
+            extinf = line
+            channel_name = normalize_entry_name(parse_extinf_name(line))
+        # URL行
+        elif line.startswith(URL_PREFIXES):
+            yield M3UEntry(channel_name, line.strip(), extinf)
+
+        # 处理后缀名为m3u，但是内容为txt的文件
+        if include_txt_lines and "," in line and "://" in line and "#genre#" not in line:
+            parts = split_txt_line(line)
+            if parts is not None:
+                yield M3UEntry(parts[0], parts[1], "")
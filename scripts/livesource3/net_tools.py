@@ -0,0 +1,311 @@
+# 直播源脚本共用的网络工具（livesource3.py 与 blacklist/blacklist.py 共用）
+# keep-alive连接池：同一主机的请求复用TCP连接，HTTPS复用TLS会话，减少重复握手
+# 响应解压：按Content-Encoding增量解压gzip/deflate
+# 签名URL过期时间：解析常见CDN防盗链参数中的过期时间
+# URL去重键：等价的URL写法得到同一个键，生成与检测时按它去重
+
+import calendar
+import contextlib
+import http.client
+import re
+import socket
+import ssl
+import threading
+import time
+import urllib.error
+import zlib
+from urllib.parse import urlsplit, urljoin, parse_qsl
+
+# ======================
+# 连接池配置
+# ======================
+
+HTTP_POOL_MAX_PER_HOST = 4     # 每个主机最多保留的空闲连接数
+HTTP_POOL_MAX_TOTAL = 64       # 所有主机合计最多保留的空闲连接数
+HTTP_POOL_IDLE_TIMEOUT = 30    # 空闲超过该秒数的连接直接关闭
+HTTP_MAX_REDIRECTS = 5         # 最多跟随的重定向次数
+
+pool_lock = threading.Lock()
+idle_connections = {}  # (scheme, host, port) -> [(连接, 放回时间)]
+tls_sessions = {}      # (host, port) -> 最近一次的TLS会话
+pool_stats = {'new': 0, 'reused': 0, 'tls_resumed': 0}
+ssl_context = ssl.create_default_context()
+
+class TLSSessionHTTPSConnection(http.client.HTTPSConnection):
+    # 握手时带上该主机上一次的TLS会话，服务器支持时可省去完整握手
+    def connect(self):
+        http.client.HTTPConnection.connect(self)
+        with pool_lock:
+            session = tls_sessions.get((self.host, self.port))
+        self.sock = self._context.wrap_socket(self.sock, server_hostname=self.host, session=session)
+        if self.sock.session_reused:
+            with pool_lock:
+                pool_stats['tls_resumed'] += 1
+
+def new_connection(key, timeout):
+    scheme, host, port = key
+    if scheme == 'https':
+        return TLSSessionHTTPSConnection(host, port, timeout=timeout, context=ssl_context)
+    return http.client.HTTPConnection(host, port, timeout=timeout)
+
+# 取一个到该主机的连接：优先复用未过期的空闲连接，没有则新建，返回 (连接, 是否复用)
+def acquire_connection(key, timeout=None):
+    now = time.time()
+    with pool_lock:
+        idle = idle_connections.get(key, [])
+        while idle:
+            conn, idle_since = idle.pop()  # 最近放回的连接最可能还活着
+            if now - idle_since <= HTTP_POOL_IDLE_TIMEOUT and conn.sock is not None:
+                pool_stats['reused'] += 1
+                conn.timeout = timeout
+                conn.sock.settimeout(timeout)
+                return conn, True
+            conn.close()
+        pool_stats['new'] += 1
+    return new_connection(key, timeout), False
+
+# 清理所有主机中空闲超时的连接（调用方持有pool_lock），返回剩余空闲连接总数
+def evict_idle_connections(now):
+    total = 0
+    for key in list(idle_connections):
+        fresh = []
+        for conn, idle_since in idle_connections[key]:
+            if now - idle_since > HTTP_POOL_IDLE_TIMEOUT:
+                conn.close()
+            else:
+                fresh.append((conn, idle_since))
+        if fresh:
+            idle_connections[key] = fresh
+            total += len(fresh)
+        else:
+            del idle_connections[key]
+    return total
+
+# 把连接放回连接池，超出单主机或总数上限时直接关闭
+def release_connection(key, conn):
+    if conn.sock is None:
+        return
+    now = time.time()
+    with pool_lock:
+        if isinstance(conn.sock, ssl.SSLSocket) and conn.sock.session is not None:
+            tls_sessions[(conn.host, conn.port)] = conn.sock.session
+        total = evict_idle_connections(now)
+        idle = idle_connections.setdefault(key, [])
+        if len(idle) >= HTTP_POOL_MAX_PER_HOST or total >= HTTP_POOL_MAX_TOTAL:
+            conn.close()
+            return
+        idle.append((conn, now))
+
+# 响应结束后的连接处理：内容已读完且服务器未要求关闭则放回连接池，否则关闭
+def finish_response(key, conn, response):
+    if response.isclosed() and not response.will_close:
+        release_connection(key, conn)
+    else:
+        conn.close()
+
+# 建立连接（timeout为连接超时），之后的读写使用read_timeout
+def request_on_connection(conn, path, headers, read_timeout):
+    if conn.sock is None:
+        conn.connect()
+    if read_timeout is not None:
+        conn.sock.settimeout(read_timeout)
+    conn.request('GET', path, headers=headers)
+    return conn.getresponse()
+
+def send_request(key, path, headers, timeout, read_timeout=None):
+    conn, reused = acquire_connection(key, timeout)
+    try:
+        return conn, request_on_connection(conn, path, headers, read_timeout)
+    except (http.client.HTTPException, OSError) as e:
+        conn.close()
+        if not reused or isinstance(e, socket.timeout):
+            raise urllib.error.URLError(e)
+    # 复用的连接可能已被服务器关闭，换一个新连接重试一次
+    with pool_lock:
+        pool_stats['new'] += 1
+    conn = new_connection(key, timeout)
+    try:
+        return conn, request_on_connection(conn, path, headers, read_timeout)
+    except (http.client.HTTPException, OSError) as e:
+        conn.close()
+        raise urllib.error.URLError(e)
+
+# 通过连接池发起GET请求，自动跟随重定向，状态码>=300时抛出urllib.error.HTTPError（与urlopen一致）
+# timeout为连接超时，read_timeout为读取超时（不指定时与timeout相同）
+# 用法: with open_url(url, headers, timeout) as response: response.read(...)
+@contextlib.contextmanager
+def open_url(url, headers=None, timeout=None, read_timeout=None):
+    headers = dict(headers or {})
+    for _ in range(HTTP_MAX_REDIRECTS + 1):
+        parts = urlsplit(url)
+        scheme = parts.scheme.lower()
+        if scheme not in ('http', 'https') or not parts.hostname:
+            raise urllib.error.URLError(f"unsupported url: {url}")
+        key = (scheme, parts.hostname, parts.port or (443 if scheme == 'https' else 80))
+        path = (parts.path or '/') + (f"?{parts.query}" if parts.query else '')
+
+        conn, response = send_request(key, path, headers, timeout, read_timeout)
+        location = response.getheader('Location')
+        if response.status in (301, 302, 303, 307, 308) and location:
+            response.read()
+            finish_response(key, conn, response)
+            url = urljoin(url, location)
+            continue
+        if response.status >= 300:
+            response.read()
+            finish_response(key, conn, response)
+            raise urllib.error.HTTPError(url, response.status, response.reason, response.headers, None)
+        break
+    else:
+        raise urllib.error.URLError(f"too many redirects: {url}")
+
+    try:
+        yield response
+    finally:
+        finish_response(key, conn, response)
+
+# 读完小响应体以便连接放回连接池；没有Content-Length或超过max_bytes的（如视频流）不读，连接随后关闭
+def drain_response(response, max_bytes=64 * 1024):
+    if response.length is not None and response.length <= max_bytes:
+        response.read()
+
+def close_all_connections():
+    with pool_lock:
+        for idle in idle_connections.values():
+            for conn, _ in idle:
+                conn.close()
+        idle_connections.clear()
+
+def connection_reuse_summary():
+    total = pool_stats['new'] + pool_stats['reused']
+    ratio = pool_stats['reused'] / total if total else 0
+    return (f"连接复用: {pool_stats['reused']}/{total} ({ratio:.0%}), "
+            f"新建连接: {pool_stats['new']}, TLS会话复用: {pool_stats['tls_resumed']}")
+
+# ======================
+# 响应解压
+# ======================
+
+# 根据Content-Encoding返回增量解压函数 (decompress, flush)，未压缩时原样返回
+def make_content_decoder(content_encoding):
+    encoding = (content_encoding or '').strip().lower()
+    if encoding in ('gzip', 'x-gzip'):
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    elif encoding == 'deflate':
+        decompressor = zlib.decompressobj(zlib.MAX_WBITS)
+    else:
+        return (lambda chunk: chunk), (lambda: b'')
+
+    state = {'decompressor': decompressor, 'first': True}
+    def decompress(chunk):
+        try:
+            return state['decompressor'].decompress(chunk)
+        except zlib.error:
+            # 部分服务器的deflate不带zlib头（raw deflate），首块解压失败时换成raw模式
+            if encoding != 'deflate' or not state['first']:
+                raise
+            state['decompressor'] = zlib.decompressobj(-zlib.MAX_WBITS)
+            return state['decompressor'].decompress(chunk)
+        finally:
+            state['first'] = False
+    def flush():
+        return state['decompressor'].flush()
+    return decompress, flush
+
+# 读取整个响应内容（按Content-Encoding解压），返回 (解压后内容, 传输字节数)
+def read_response_body(response, chunk_size=64 * 1024):
+    decompress, flush = make_content_decoder(response.headers.get('Content-Encoding'))
+    chunks = []
+    wire_size = 0
+    while True:
+        chunk = response.read(chunk_size)
+        if not chunk:
+            break
+        wire_size += len(chunk)
+        chunks.append(decompress(chunk))
+    chunks.append(flush())
+    return b''.join(chunks), wire_size
+
+# ======================
+# 签名URL过期时间
+# ======================
+
+# 解析10位秒/13位毫秒时间戳，allow_hex时也接受8位十六进制秒数（腾讯云txTime、网宿wsTime）
+def parse_expiry_timestamp(value, allow_hex=False):
+    value = value.strip()
+    if value.isdigit() and len(value) in (10, 13):
+        return int(value) / 1000 if len(value) == 13 else int(value)
+    if allow_hex and re.fullmatch(r'[0-9a-fA-F]{8}', value):
+        return int(value, 16)
+    return None
+
+# 返回URL中签名参数的过期时间（时间戳），没有可识别的过期参数时返回None
+# txTime（腾讯云）、wsTime（网宿）、auth_key（阿里云，时间戳-随机数-uid-签名）、
+# X-Amz-Date+X-Amz-Expires（S3预签名）、expires/expire/e（CloudFront、七牛等）
+def get_url_expiry(url):
+    if '?' not in url:
+        return None
+    params = {key.lower(): value for key, value in parse_qsl(urlsplit(url).query, keep_blank_values=True)}
+    if 'txtime' in params:
+        return parse_expiry_timestamp(params['txtime'], allow_hex=True)
+    if 'wstime' in params:
+        return parse_expiry_timestamp(params['wstime'], allow_hex=True)
+    if 'auth_key' in params:
+        return parse_expiry_timestamp(params['auth_key'].split('-')[0])
+    if 'x-amz-date' in params and params.get('x-amz-expires', '').isdigit():
+        try:
+            signed_at = calendar.timegm(time.strptime(params['x-amz-date'], '%Y%m%dT%H%M%SZ'))
+        except ValueError:
+            return None
+        return signed_at + int(params['x-amz-expires'])
+    for key in ('expires', 'expire', 'e'):
+        if key in params:
+            expiry = parse_expiry_timestamp(params[key])
+            if expiry is not None:
+                return expiry
+    return None
+
+# ======================
+# URL去重键
+# ======================
+
+DEFAULT_PORTS = {'http': 80, 'https': 443, 'rtmp': 1935, 'rtsp': 554}
+# 统计/跟踪参数：不影响返回的内容，计算去重键时去掉
+TRACKING_PARAMS = frozenset(['spm', 'fbclid', 'gclid', 'msclkid', 'yclid', 'mc_cid', 'mc_eid'])
+TRACKING_PARAM_PREFIXES = ('utm_',)
+
+def is_tracking_param(name):
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PARAM_PREFIXES)
+
+# 返回URL的去重键：协议和主机名统一小写，去掉默认端口、空的查询参数（末尾的?和多余的&）和跟踪参数，
+# 查询参数按名称排序（同名参数保持原顺序），http(s)的空路径视为/；无法解析的URL原样返回
+# #片段保留在键中：有的直播源用#分隔备用地址或附带播放器参数，片段不同的是不同的行
+# 只用于判断是否重复，保存和检测时仍使用原URL
+def canonical_url_key(url):
+    url = url.strip()
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return url
+    scheme = parts.scheme.lower()
+    if not scheme or not parts.netloc:
+        return url
+    host = parts.hostname or ''
+    if ':' in host:
+        host = f"[{host}]"  # IPv6地址
+    netloc = host if port is None or port == DEFAULT_PORTS.get(scheme) else f"{host}:{port}"
+    if '@' in parts.netloc:
+        netloc = f"{parts.netloc.rpartition('@')[0]}@{netloc}"
+    path = parts.path
+    if not path and scheme in ('http', 'https'):
+        path = '/'
+    params = [param for param in parts.query.split('&') if param and not is_tracking_param(param.split('=', 1)[0])]
+    params.sort(key=lambda param: param.split('=', 1)[0])
+    key = f"{scheme}://{netloc}{path}"
+    if params:
+        key += f"?{'&'.join(params)}"
+    if parts.fragment:
+        key += f"#{parts.fragment}"
+    return key
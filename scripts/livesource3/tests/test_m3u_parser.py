@@ -0,0 +1,110 @@
+# m3u_parser 单元测试
+# 运行: python -m unittest discover -s scripts/livesource3/tests （或 python -m pytest scripts/livesource3/tests）
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import m3u_parser
+
+
+def entries(text, **kwargs):
+    return list(m3u_parser.iter_m3u_entries(text.split('\n'), **kwargs))
+
+
+class ParseExtinfNameTest(unittest.TestCase):
+    def test_plain_name(self):
+        self.assertEqual(m3u_parser.parse_extinf_name('#EXTINF:-1,CCTV1'), 'CCTV1')
+
+    def test_name_with_commas(self):
+        self.assertEqual(m3u_parser.parse_extinf_name('#EXTINF:-1 group-title="新闻",Foo, Bar'), 'Foo, Bar')
+
+    def test_comma_inside_quoted_attribute(self):
+        line = '#EXTINF:-1 tvg-name="A,B" group-title="体育,赛事",CCTV5'
+        self.assertEqual(m3u_parser.parse_extinf_name(line), 'CCTV5')
+
+    def test_no_comma_returns_whole_line(self):
+        self.assertEqual(m3u_parser.parse_extinf_name('#EXTINF:-1 '), '#EXTINF:-1')
+
+    def test_name_is_stripped(self):
+        self.assertEqual(m3u_parser.parse_extinf_name('#EXTINF:-1,  CCTV1  '), 'CCTV1')
+
+
+class AttributesTest(unittest.TestCase):
+    def test_attributes_with_quotes_and_commas(self):
+        line = '#EXTINF:-1 tvg-id="cctv1" tvg-name="CCTV-1,综合" tvg-logo="http://x/a.png" group-title="央视",CCTV1'
+        entry = entries(f'{line}\nhttp://x/1.m3u8')[0]
+        self.assertEqual(entry.tvg_id, 'cctv1')
+        self.assertEqual(entry.tvg_name, 'CCTV-1,综合')
+        self.assertEqual(entry.tvg_logo, 'http://x/a.png')
+        self.assertEqual(entry.group_title, '央视')
+
+    def test_attribute_names_are_case_insensitive(self):
+        entry = entries('#EXTINF:-1 Group-Title="卫视",湖南卫视\nhttp://x/2.m3u8')[0]
+        self.assertEqual(entry.group_title, '卫视')
+
+    def test_missing_attributes(self):
+        entry = entries('#EXTINF:-1,CCTV1\nhttp://x/1.m3u8')[0]
+        self.assertEqual(entry.attributes, {})
+        self.assertEqual(entry.tvg_logo, '')
+
+
+class IterM3UEntriesTest(unittest.TestCase):
+    def test_extinf_and_url(self):
+        text = '#EXTM3U x-tvg-url="http://e.xml"\n#EXTINF:-1,CCTV1\nhttp://x/1.m3u8\n#EXTINF:-1,CCTV2\nrtmp://x/2'
+        self.assertEqual([entry[:2] for entry in entries(text)],
+                         [('CCTV1', 'http://x/1.m3u8'), ('CCTV2', 'rtmp://x/2')])
+
+    def test_commas_in_name_become_spaces(self):
+        text = '#EXTINF:-1 group-title="综合",Foo, Bar,,Baz\nhttp://y.com/foobar.m3u8'
+        entry = entries(text)[0]
+        self.assertEqual(entry.name, 'Foo Bar Baz')
+        self.assertEqual(f"{entry.name},{entry.url}".split(','), ['Foo Bar Baz', 'http://y.com/foobar.m3u8'])
+
+    def test_extinf_line_is_kept(self):
+        line = '#EXTINF:-1 tvg-name="A",A'
+        self.assertEqual(entries(f'{line}\nhttp://x/a')[0].extinf, line)
+
+    def test_missing_url_yields_nothing(self):
+        self.assertEqual(entries('#EXTM3U\n#EXTINF:-1,CCTV1\n#EXTINF:-1,CCTV2\n'), [])
+
+    def test_url_without_extinf_has_empty_name(self):
+        self.assertEqual([entry[:3] for entry in entries('http://x/1.m3u8')], [('', 'http://x/1.m3u8', '')])
+
+    def test_name_carries_over_to_next_url(self):
+        # 与原来一样：一个#EXTINF后面有多个URL时都使用该名称
+        text = '#EXTINF:-1,CCTV1\nhttp://x/1\nhttp://x/2'
+        self.assertEqual([entry.name for entry in entries(text)], ['CCTV1', 'CCTV1'])
+
+    def test_url_is_stripped(self):
+        self.assertEqual(entries('#EXTINF:-1,A\nhttp://x/a  ')[0].url, 'http://x/a')
+
+    def test_other_directives_are_skipped(self):
+        text = '#EXTINF:-1,A\n#EXTVLCOPT:http-user-agent=x\nhttp://x/a\n#EXTGRP:g'
+        self.assertEqual([entry[:2] for entry in entries(text)], [('A', 'http://x/a')])
+
+    def test_embedded_txt_lines(self):
+        text = '#EXTM3U\n央视,#genre#\nCCTV1,http://x/1.m3u8\nbad line,no scheme\nA,http://x/a b'
+        self.assertEqual([entry[:3] for entry in entries(text)], [('CCTV1', 'http://x/1.m3u8', '')])
+
+    def test_embedded_txt_lines_can_be_excluded(self):
+        text = '#EXTINF:-1,A\nhttp://x/a\nCCTV1,http://x/1.m3u8'
+        self.assertEqual([entry[:2] for entry in entries(text, include_txt_lines=False)], [('A', 'http://x/a')])
+
+
+class SplitTxtLineTest(unittest.TestCase):
+    def test_valid_line(self):
+        self.assertEqual(m3u_parser.split_txt_line('CCTV1,http://x/1.m3u8'), ('CCTV1', 'http://x/1.m3u8'))
+
+    def test_matches_original_regex(self):
+        import re
+        pattern = re.compile(r'^[^,]+,[^\s]+://[^\s]+$')
+        for line in ('CCTV1,http://x/1', ',http://x/1', 'A,://x', 'A,http://', 'A,http://x y', 'A,B,http://x/1',
+                     'A,http://x/1,2', 'A,http:// x', ' A,http://x/1', 'A, http://x/1', 'A,x://y'):
+            expected = (line.split(',', 1)[0], line.split(',', 1)[1]) if pattern.match(line) else None
+            self.assertEqual(m3u_parser.split_txt_line(line), expected, line)
+
+
+if __name__ == '__main__':
+    unittest.main()
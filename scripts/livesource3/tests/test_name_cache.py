@@ -0,0 +1,86 @@
+# 名称缓存/行级记录的跨运行测试：用回放存档在临时目录中完整运行livesource3.py，依次为首次运行、内容不变、内容变化
+# 运行: python -m unittest discover -s scripts/livesource3/tests （或 python -m pytest scripts/livesource3/tests）
+
+import importlib.util
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+import zipfile
+
+LIVESOURCE3_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SOURCE_URL = 'http://fixture.test/daily.txt'
+
+COLD_BODY = """央视,#genre#
+CCTV-1高清,http://a.test/1.m3u8
+湖南卫视,http://a.test/2.m3u8
+测试频道甲,http://a.test/3.m3u8
+测试频道乙,http://a.test/4.m3u8
+"""
+
+# 删掉测试频道乙，新增测试频道丙，其余行不变
+CHURN_BODY = """央视,#genre#
+CCTV-1高清,http://a.test/1.m3u8
+湖南卫视,http://a.test/2.m3u8
+测试频道甲,http://a.test/3.m3u8
+测试频道丙,http://a.test/5.m3u8
+"""
+
+
+@unittest.skipUnless(importlib.util.find_spec('opencc'), 'opencc not installed')
+class NameCacheAcrossRunsTest(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        shutil.copytree(LIVESOURCE3_DIR, os.path.join(self.root, 'scripts', 'livesource3'),
+                        ignore=shutil.ignore_patterns('cache', 'tests', '__pycache__'))
+        os.makedirs(os.path.join(self.root, 'output', 'livesource3'))
+        with open(os.path.join(self.root, 'scripts', 'livesource3', 'urls-daily.txt'), 'w', encoding='utf-8') as f:
+            f.write(SOURCE_URL + '\n')
+        self.archive = os.path.join(self.root, 'fixtures.zip')
+
+    # 用给定的订阅内容回放运行一次，返回 (命中数, 新处理数, 保存的名称)
+    def run_generator(self, body):
+        with zipfile.ZipFile(self.archive, 'w') as archive:
+            archive.writestr('bodies/daily.body', body)
+            manifest = {'recorded_at': time.time(),
+                        'sources': {SOURCE_URL: {'file': 'bodies/daily.body', 'source': 'network'}}}
+            archive.writestr('manifest.json', json.dumps(manifest))
+        env = dict(os.environ, LIVESOURCE3_FIXTURE='replay', LIVESOURCE3_FIXTURE_ARCHIVE=self.archive)
+        result = subprocess.run([sys.executable, 'scripts/livesource3/livesource3.py'], cwd=self.root, env=env,
+                                capture_output=True, text=True, encoding='utf-8', timeout=120)
+        self.assertEqual(result.returncode, 0, result.stdout + result.stderr)
+        match = re.search(r'名称缓存: 命中 (\d+), 新处理 (\d+)', result.stdout)
+        self.assertIsNotNone(match, result.stdout)
+        with open(os.path.join(self.root, 'scripts', 'livesource3', 'cache', 'names.json'), encoding='utf-8') as f:
+            names = json.load(f)['names']
+        return int(match.group(1)), int(match.group(2)), names
+
+    def test_cold_warm_and_churn_runs(self):
+        source_names = {'CCTV-1高清', '湖南卫视', '测试频道甲', '测试频道乙'}
+
+        _, cold_miss, cold_names = self.run_generator(COLD_BODY)
+        self.assertLessEqual(source_names, cold_names.keys())
+        self.assertGreaterEqual(cold_miss, len(source_names))
+
+        # 内容不变：全部行复用，名称缓存不丢失
+        _, warm_miss, warm_names = self.run_generator(COLD_BODY)
+        self.assertEqual(warm_miss, 0)
+        self.assertEqual(warm_names, cold_names)
+
+        # 内容变化：只有新增的名称需要处理，删掉的名称不再保存
+        _, churn_miss, churn_names = self.run_generator(CHURN_BODY)
+        self.assertEqual(churn_miss, 1)
+        self.assertIn('测试频道丙', churn_names)
+        self.assertNotIn('测试频道乙', churn_names)
+        self.assertEqual(churn_names.keys() - {'测试频道丙'}, cold_names.keys() - {'测试频道乙'})
+        self.assertEqual(churn_names['湖南卫视'], cold_names['湖南卫视'])
+
+
+if __name__ == '__main__':
+    unittest.main()
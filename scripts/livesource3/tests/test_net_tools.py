@@ -0,0 +1,128 @@
+# net_tools 单元测试：URL去重键、签名URL过期时间
+# 运行: python -m unittest discover -s scripts/livesource3/tests （或 python -m pytest scripts/livesource3/tests）
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import net_tools
+
+key = net_tools.canonical_url_key
+
+
+class CanonicalUrlKeyTest(unittest.TestCase):
+    def assertSameKey(self, a, b):
+        self.assertEqual(key(a), key(b), (a, b))
+
+    def assertDifferentKey(self, a, b):
+        self.assertNotEqual(key(a), key(b), (a, b))
+
+    def test_scheme_and_host_are_lowercased(self):
+        self.assertEqual(key('HTTP://Example.COM/Live/CCTV1.m3u8'), 'http://example.com/Live/CCTV1.m3u8')
+
+    def test_path_case_is_kept(self):
+        self.assertDifferentKey('http://a.com/live/a.m3u8', 'http://a.com/LIVE/a.m3u8')
+
+    def test_default_ports_are_dropped(self):
+        self.assertSameKey('http://a.com:80/x', 'http://a.com/x')
+        self.assertSameKey('https://a.com:443/x', 'https://a.com/x')
+        self.assertSameKey('rtmp://a.com:1935/live/x', 'rtmp://a.com/live/x')
+        self.assertSameKey('rtsp://a.com:554/x', 'rtsp://a.com/x')
+
+    def test_other_ports_are_kept(self):
+        self.assertEqual(key('http://a.com:8080/x'), 'http://a.com:8080/x')
+        self.assertDifferentKey('http://a.com:8080/x', 'http://a.com/x')
+        self.assertDifferentKey('https://a.com:80/x', 'https://a.com/x')  # 80不是https的默认端口
+
+    def test_ipv6_host(self):
+        self.assertEqual(key('http://[::1]:80/x'), 'http://[::1]/x')
+        self.assertEqual(key('http://[2001:db8::1]:8080/x'), 'http://[2001:db8::1]:8080/x')
+
+    def test_userinfo_is_kept(self):
+        self.assertEqual(key('rtsp://user:pw@A.com:554/x'), 'rtsp://user:pw@a.com/x')
+
+    def test_empty_http_path_is_root(self):
+        self.assertSameKey('http://a.com', 'http://a.com/')
+        self.assertEqual(key('rtmp://a.com'), 'rtmp://a.com')
+
+    def test_empty_query(self):
+        self.assertSameKey('http://a.com/x?', 'http://a.com/x')
+        self.assertSameKey('http://a.com/x?a=1&&b=2&', 'http://a.com/x?a=1&b=2')
+
+    def test_tracking_params_are_dropped(self):
+        self.assertSameKey('http://a.com/x?id=1&utm_source=t&UTM_Medium=m&spm=1.2&fbclid=z', 'http://a.com/x?id=1')
+        self.assertSameKey('http://a.com/x?gclid=1', 'http://a.com/x')
+
+    def test_other_params_are_kept(self):
+        self.assertDifferentKey('http://a.com/x?id=1', 'http://a.com/x?id=2')
+        self.assertDifferentKey('http://a.com/x?token=abc', 'http://a.com/x')
+
+    def test_params_are_sorted_by_name(self):
+        self.assertSameKey('http://a.com/x?b=2&a=1', 'http://a.com/x?a=1&b=2')
+        self.assertEqual(key('http://a.com/x?b=2&a=1'), 'http://a.com/x?a=1&b=2')
+
+    def test_repeated_params_keep_their_order(self):
+        self.assertEqual(key('http://a.com/x?a=2&b=0&a=1'), 'http://a.com/x?a=2&a=1&b=0')
+        self.assertDifferentKey('http://a.com/x?a=2&a=1', 'http://a.com/x?a=1&a=2')
+
+    def test_fragment_is_kept(self):
+        self.assertEqual(key('http://a.com/x?b=1&a=2#backup'), 'http://a.com/x?a=2&b=1#backup')
+        self.assertDifferentKey('http://a.com/x#1', 'http://a.com/x#2')
+        self.assertDifferentKey('http://a.com/x#1', 'http://a.com/x')
+
+    def test_surrounding_whitespace(self):
+        self.assertSameKey('  http://a.com/x\n', 'http://a.com/x')
+
+    def test_unparsable_urls_are_returned_as_is(self):
+        self.assertEqual(key('http://a.com:port/x'), 'http://a.com:port/x')
+        self.assertEqual(key('not a url'), 'not a url')
+        self.assertEqual(key('/relative/path'), '/relative/path')
+
+
+class GetUrlExpiryTest(unittest.TestCase):
+    expiry = staticmethod(net_tools.get_url_expiry)
+
+    def test_no_query(self):
+        self.assertIsNone(self.expiry('http://a.com/live.m3u8'))
+
+    def test_no_expiry_param(self):
+        self.assertIsNone(self.expiry('http://a.com/live.m3u8?id=1&token=abc'))
+
+    def test_tencent_txtime_hex(self):
+        self.assertEqual(self.expiry('http://a.com/x.flv?txSecret=s&txTime=6553F100'), 0x6553F100)
+
+    def test_wangsu_wstime_decimal(self):
+        self.assertEqual(self.expiry('http://a.com/x.flv?wsSecret=s&wsTime=1700000000'), 1700000000)
+
+    def test_param_names_are_case_insensitive(self):
+        self.assertEqual(self.expiry('http://a.com/x?TXTIME=1700000000'), 1700000000)
+
+    def test_aliyun_auth_key(self):
+        self.assertEqual(self.expiry('http://a.com/x.m3u8?auth_key=1700000000-0-0-0123456789abcdef'), 1700000000)
+
+    def test_s3_presigned(self):
+        url = 'https://b.s3.amazonaws.com/x?X-Amz-Date=20240101T000000Z&X-Amz-Expires=3600&X-Amz-Signature=s'
+        self.assertEqual(self.expiry(url), 1704067200 + 3600)
+
+    def test_s3_invalid_date(self):
+        self.assertIsNone(self.expiry('https://b/x?X-Amz-Date=2024-01-01&X-Amz-Expires=3600'))
+
+    def test_expires_seconds_and_milliseconds(self):
+        self.assertEqual(self.expiry('http://a.com/x?Expires=1700000000&Signature=s'), 1700000000)
+        self.assertEqual(self.expiry('http://a.com/x?expire=1700000000123'), 1700000000.123)
+
+    def test_short_e_param(self):
+        self.assertEqual(self.expiry('http://a.com/x?e=1700000000&token=t'), 1700000000)
+
+    def test_non_timestamp_values_are_ignored(self):
+        self.assertIsNone(self.expiry('http://a.com/x?expires=never'))
+        self.assertIsNone(self.expiry('http://a.com/x?e=12345'))
+        self.assertEqual(self.expiry('http://a.com/x?expires=never&e=1700000000'), 1700000000)
+
+    def test_hex_only_for_tx_and_ws_time(self):
+        self.assertIsNone(self.expiry('http://a.com/x?expires=6553F100'))
+
+
+if __name__ == '__main__':
+    unittest.main()